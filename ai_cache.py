@@ -0,0 +1,173 @@
+import hashlib
+import json
+import math
+import numbers
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import perf
+
+# Persistent Claude response cache. SQLite in WAL mode lets every worker
+# process on the host share one file, and entries survive restarts.
+
+CACHE_PATH = os.environ.get("AI_CACHE_PATH", os.path.join(".cache", "ai_responses.sqlite3"))
+CACHE_TTL = float(os.environ.get("AI_CACHE_TTL", 24 * 60 * 60))
+MARKET_TTL = float(os.environ.get("AI_CACHE_MARKET_TTL", 60 * 60))
+MAX_ENTRIES = int(os.environ.get("AI_CACHE_MAX_ENTRIES", 5000))
+
+_NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def normalize_prompt(prompt, mask_numbers=False):
+    # Collapse the indentation of triple-quoted prompts and ignore case. When
+    # market inputs are keyed separately, the raw numbers embedded in the
+    # prompt are masked so tiny price moves still hit the same entry.
+    text = " ".join(prompt.split()).casefold()
+    return _NUMBER.sub("#", text) if mask_numbers else text
+
+
+def _significant(value, digits):
+    # numbers.Real also covers numpy scalars (prices from float32 frames)
+    if not isinstance(value, numbers.Real) or isinstance(value, bool) or not math.isfinite(value) or value == 0:
+        return value
+    value = int(value) if isinstance(value, numbers.Integral) else float(value)
+    return round(value, digits - 1 - int(math.floor(math.log10(abs(value)))))
+
+
+def quantize_market(market):
+    # Price to 3 significant figures (~0.5% buckets), PE and market cap to 2;
+    # anything else (symbols, 'N/A') is keyed as-is
+    digits = {'price': 3, 'pe_ratio': 2, 'market_cap': 2}
+    return {k: _significant(v, digits.get(k, 3)) for k, v in sorted(market.items())}
+
+
+def make_key(model, prompt, market=None):
+    payload = {
+        'model': model,
+        'prompt': normalize_prompt(prompt, mask_numbers=market is not None),
+        'market': quantize_market(market) if market is not None else None,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS responses ("
+                        "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                        "expires REAL NOT NULL, accessed REAL NOT NULL)"
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+                    conn.commit()
+                    self._ready = True
+        return conn
+
+    # The cache is best-effort: a locked or unwritable database counts as a
+    # miss and never fails the request it sits in front of
+    def get(self, key):
+        response = self.peek(key)
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    def peek(self, key):
+        # get() without counting a hit or miss, for re-checking a key that was
+        # just counted (e.g. by a single-flight leader)
+        now = time.time()
+        row = None
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    row = conn.execute(
+                        "SELECT response FROM responses WHERE key = ? AND expires > ?", (key, now)
+                    ).fetchone()
+                    if row is not None:
+                        conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            self.errors += 1
+        return row[0] if row is not None else None
+
+    def set(self, key, response, ttl=CACHE_TTL):
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, response, expires, accessed) VALUES (?, ?, ?, ?)",
+                        (key, response, now + ttl, now)
+                    )
+                    # Drop expired rows, then the least recently read ones over the limit
+                    conn.execute("DELETE FROM responses WHERE expires <= ?", (now,))
+                    conn.execute(
+                        "DELETE FROM responses WHERE key IN ("
+                        "SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,)
+                    )
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            self.errors += 1
+
+    def stats(self):
+        try:
+            conn = self._connect()
+            try:
+                size = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            size = None
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': size,
+            'max_entries': self.max_entries,
+        }
+
+    def register_metrics(self, label):
+        # Same rows as market_cache.TTLCache, plus SQLite errors; size is
+        # left out when the database can't be read
+        def collect():
+            stats = self.stats()
+            rows = [
+                ('cache_hits_total', {'cache': label}, stats['hits']),
+                ('cache_misses_total', {'cache': label}, stats['misses']),
+                ('cache_errors_total', {'cache': label}, stats['errors']),
+            ]
+            if stats['size'] is not None:
+                rows.append(('cache_size', {'cache': label}, stats['size']))
+            return rows
+
+        perf.register_collector(collect)
+
+
+if os.path.dirname(CACHE_PATH):
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+cache = ResponseCache(CACHE_PATH, MAX_ENTRIES)
+cache.register_metrics('ai')
@@ -0,0 +1,222 @@
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import anthropic
+import httpx
+
+import perf
+from singleflight import SingleFlight
+
+# Claude calls shared by the app. Kept free of Streamlit so they can be
+# exercised against a local fake Anthropic server (ANTHROPIC_BASE_URL).
+
+MODEL = "claude-3-5-sonnet-20241022"
+MAX_TOKENS = 1000
+STREAMING = os.environ.get("AI_STREAMING", "1") != "0"
+
+MAX_CONCURRENCY = int(os.environ.get("AI_MAX_CONCURRENCY", 8))
+QUEUE_TIMEOUT = float(os.environ.get("AI_QUEUE_TIMEOUT", 30))
+REQUEST_TIMEOUT = float(os.environ.get("AI_REQUEST_TIMEOUT", 60))
+MAX_RETRIES = int(os.environ.get("AI_MAX_RETRIES", 3))
+BACKOFF_BASE = float(os.environ.get("AI_BACKOFF_BASE", 0.5))
+BACKOFF_MAX = float(os.environ.get("AI_BACKOFF_MAX", 8))
+BREAKER_THRESHOLD = int(os.environ.get("AI_BREAKER_THRESHOLD", 5))
+BREAKER_COOLDOWN = float(os.environ.get("AI_BREAKER_COOLDOWN", 60))
+
+
+class UpstreamUnavailable(Exception):
+    pass
+
+
+class CircuitBreaker:
+    # Opens after `threshold` consecutive upstream failures and rejects calls
+    # for `cooldown` seconds; then lets a single trial call through and closes
+    # again if it succeeds.
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self.opened_at is not None and time.monotonic() - self.opened_at < self.cooldown
+
+    def allow(self):
+        # False to reject the call, otherwise a truthy ticket. Every ticket
+        # must be handed to release() when the call ends, so a trial call that
+        # ended without recording an outcome (e.g. an abandoned stream) does
+        # not block every later trial.
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown or self._trial is not None:
+                return False
+            self._trial = object()
+            return self._trial
+
+    def release(self, ticket):
+        with self._lock:
+            if self._trial is ticket:
+                self._trial = None
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._trial = None
+
+
+breaker = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_COOLDOWN)
+_slots = threading.BoundedSemaphore(MAX_CONCURRENCY)
+_clients = {}
+_clients_lock = threading.Lock()
+# Shared by callers that coalesce identical prompts (keyed on the cache key)
+flights = SingleFlight('ai')
+
+perf.register_collector(lambda: [('ai_breaker_open', {}, int(breaker.is_open))])
+
+
+def get_client(api_key):
+    # One client per API key for the whole process, so every session reuses
+    # the same keep-alive connection pool. Retries are handled below, not by
+    # the SDK, so they share the backoff and circuit breaker.
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            limits = httpx.Limits(
+                max_connections=MAX_CONCURRENCY,
+                max_keepalive_connections=MAX_CONCURRENCY,
+                keepalive_expiry=60
+            )
+            client = anthropic.Anthropic(
+                api_key=api_key,
+                max_retries=0,
+                timeout=REQUEST_TIMEOUT,
+                http_client=anthropic.DefaultHttpxClient(limits=limits, timeout=REQUEST_TIMEOUT)
+            )
+            _clients[api_key] = client
+        return client
+
+
+def _retryable(exc):
+    if isinstance(exc, anthropic.APIConnectionError):
+        return True
+    return isinstance(exc, anthropic.APIStatusError) and (exc.status_code == 429 or exc.status_code >= 500)
+
+
+def _backoff(attempt, exc):
+    retry_after = None
+    response = getattr(exc, 'response', None)
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get('retry-after'))
+        except (TypeError, ValueError):
+            pass
+    # Full jitter: sleep a random amount up to the exponential cap. A longer
+    # Retry-After is honoured only up to BACKOFF_MAX, so a 429 can't park the
+    # calling script thread for minutes
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    return min(max(delay, retry_after), BACKOFF_MAX) if retry_after is not None else delay
+
+
+@contextmanager
+def _upstream_call():
+    # One attempt: a concurrency slot, then the breaker's permission. The
+    # slot comes first so a half-open trial is not spent waiting in the queue;
+    # the trial is released however the attempt ends, including a stream
+    # generator closed by a Streamlit rerun.
+    if not _slots.acquire(timeout=QUEUE_TIMEOUT):
+        perf.count('ai_rejected', reason='queue')
+        raise UpstreamUnavailable("Too many concurrent AI requests")
+    try:
+        ticket = breaker.allow()
+        if not ticket:
+            perf.count('ai_rejected', reason='breaker')
+            raise UpstreamUnavailable("Claude API is temporarily unavailable")
+        try:
+            yield
+        finally:
+            breaker.release(ticket)
+    finally:
+        _slots.release()
+
+
+def _record_failure(exc):
+    perf.count('upstream_errors', stage='anthropic', error=type(exc).__name__)
+    # Client errors (bad request, auth) mean the upstream itself is healthy
+    if _retryable(exc):
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+
+def _retry_or_raise(attempt, exc):
+    # Called outside the slot, so the backoff does not hold up other requests
+    if not _retryable(exc) or attempt == MAX_RETRIES:
+        raise exc
+    time.sleep(_backoff(attempt, exc))
+
+
+def create_response(client, prompt):
+    for attempt in range(MAX_RETRIES + 1):
+        with _upstream_call():
+            try:
+                with perf.span('anthropic.create'):
+                    response = client.messages.create(
+                        model=MODEL,
+                        max_tokens=MAX_TOKENS,
+                        messages=[{"role": "user", "content": prompt}]
+                    )
+            except Exception as e:
+                error = e
+                _record_failure(error)
+            else:
+                breaker.record_success()
+                return response.content[0].text
+        _retry_or_raise(attempt, error)
+
+
+def stream_response(client, prompt, timing=None):
+    # Yields text deltas as they arrive. When a dict is passed as `timing`,
+    # time-to-first-token and total latency (seconds) are recorded into it.
+    # Failures are only retried before the first delta has been yielded.
+    timing = {} if timing is None else timing
+    started = time.perf_counter()
+    for attempt in range(MAX_RETRIES + 1):
+        with _upstream_call():
+            try:
+                with client.messages.stream(
+                    model=MODEL,
+                    max_tokens=MAX_TOKENS,
+                    messages=[{"role": "user", "content": prompt}]
+                ) as stream:
+                    for text in stream.text_stream:
+                        if 'ttft' not in timing:
+                            timing['ttft'] = time.perf_counter() - started
+                            perf.observe('anthropic.ttft', timing['ttft'])
+                        yield text
+            except Exception as e:
+                error = e
+                _record_failure(error)
+            else:
+                breaker.record_success()
+                timing['total'] = time.perf_counter() - started
+                perf.observe('anthropic.stream', timing['total'])
+                return
+        if 'ttft' in timing:
+            raise error
+        _retry_or_raise(attempt, error)
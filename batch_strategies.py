@@ -0,0 +1,248 @@
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import perf
+from ai_cache import CACHE_TTL, make_key
+from ai_cache import cache as response_cache
+from ai_service import MAX_CONCURRENCY, MODEL, create_response, get_client
+from portfolio_engine import RISK_EQUITY_PCT, plan_table, strategy_prompt
+
+# Portfolio strategies for many client profiles at once. Profiles that only
+# differ by a few years of age or a few thousand rupees share one Claude
+# request; the allocation and projection numbers are computed locally for
+# every profile. Results are appended to a JSONL file as each request
+# completes, and a rerun with the same output file skips finished clients.
+#
+#   python batch_strategies.py clients.csv -o strategies.jsonl
+#
+# The CSV needs age, income, expenses and risk columns; client_id is optional
+# (row numbers are used otherwise).
+
+OUTPUT_DIR = os.environ.get("BATCH_OUTPUT_DIR", os.path.join(".cache", "batches"))
+AGE_BAND = 5
+AMOUNT_STEP = 5000
+REQUIRED_COLUMNS = ('age', 'income', 'expenses', 'risk')
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+class BatchInProgress(Exception):
+    pass
+
+
+def _lock(output):
+    with _locks_guard:
+        return _locks.setdefault(os.path.abspath(output), threading.Lock())
+
+
+def load_profiles(source):
+    # source: CSV path or file object, or a DataFrame
+    profiles = source.copy() if isinstance(source, pd.DataFrame) else pd.read_csv(source)
+    profiles.columns = profiles.columns.str.strip().str.lower()
+    missing = [column for column in REQUIRED_COLUMNS if column not in profiles]
+    if missing:
+        raise ValueError(f"Profiles are missing columns: {', '.join(missing)}")
+    if 'client_id' not in profiles:
+        profiles['client_id'] = profiles.index
+    profiles['client_id'] = profiles['client_id'].astype(str)
+    if profiles['client_id'].duplicated().any():
+        raise ValueError("client_id values must be unique")
+    profiles['risk'] = profiles['risk'].astype(str).str.strip().str.title()
+    unknown = sorted(set(profiles['risk']) - set(RISK_EQUITY_PCT))
+    if unknown:
+        raise ValueError(f"Unknown risk appetite: {', '.join(unknown)}")
+    return profiles
+
+
+def bucket_profiles(profiles, age_band=AGE_BAND, amount_step=AMOUNT_STEP):
+    # Representative age (middle of its band) and amounts (nearest step) that
+    # the shared prompt is written for; equal values mean the same request.
+    # The surplus is rounded on its own, and to at least one step for clients
+    # that have one, so the prompt never shows a surplus the client lacks;
+    # expenses are derived from it.
+    surplus = profiles['income'] - profiles['expenses']
+    rounded = ((surplus / amount_step).round() * amount_step).clip(lower=amount_step).where(surplus > 0, 0)
+    income = np.maximum((profiles['income'] / amount_step).round() * amount_step, rounded)
+    buckets = pd.DataFrame({
+        'age': profiles['age'] // age_band * age_band + age_band // 2,
+        'income': income,
+        'expenses': income - rounded,
+        'risk': profiles['risk'],
+    }, index=profiles.index)
+    buckets['bucket'] = (buckets['age'].astype(int).astype(str) + "|" + buckets['income'].astype(int).astype(str)
+                         + "|" + buckets['expenses'].astype(int).astype(str) + "|" + buckets['risk'])
+    return buckets
+
+
+def _finished(record, with_strategy):
+    # Rows written without a strategy (demo mode, --local-only) only count
+    # when the client had no surplus to invest, i.e. never needed one; empty
+    # strategies from older runs are redone too
+    return not with_strategy or bool(record.get('strategy')) or record.get('surplus', 0) <= 0
+
+
+def completed_clients(path, with_strategy=False):
+    # client_ids already written by an earlier (possibly interrupted) run
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                if _finished(record, with_strategy):
+                    done.add(record['client_id'])
+            except (ValueError, KeyError):
+                pass  # a line cut short by a crash is regenerated
+    return done
+
+
+def _drop_unfinished(path, done):
+    # Rewrites the output without the rows that are about to be regenerated,
+    # so every client keeps exactly one line
+    with open(path) as f:
+        lines = f.readlines()
+    kept = []
+    for line in lines:
+        try:
+            if json.loads(line)['client_id'] in done:
+                kept.append(line)
+        except (ValueError, KeyError):
+            pass
+    if len(kept) < len(lines):
+        with open(path + ".tmp", "w") as f:
+            f.writelines(line if line.endswith("\n") else line + "\n" for line in kept)
+        os.replace(path + ".tmp", path)
+
+
+def _strategy(client, prompt):
+    key = make_key(MODEL, prompt)
+    cached = response_cache.get(key)
+    if cached:
+        return cached
+    with perf.span('batch.strategy'):
+        response = create_response(client, prompt)
+    if not response:
+        # Counted as failed and left out of the file, so a rerun asks again
+        raise ValueError("Claude returned an empty strategy")
+    response_cache.set(key, response, CACHE_TTL)
+    return response
+
+
+def generate(profiles, output, client=None, concurrency=MAX_CONCURRENCY,
+             age_band=AGE_BAND, amount_step=AMOUNT_STEP, progress=None):
+    # Writes one JSON line per client to `output` and returns a summary.
+    # Without a client only the local numbers are written (strategy null).
+    # progress(done, total) is called after every write. Rows written
+    # earlier without a strategy are redone when a client is given.
+    # Raises BatchInProgress if another thread is already writing `output`.
+    lock = _lock(output)
+    if not lock.acquire(blocking=False):
+        raise BatchInProgress(f"{output} is already being generated")
+    try:
+        return _generate(profiles, output, client, concurrency, age_band, amount_step, progress)
+    finally:
+        lock.release()
+
+
+def _generate(profiles, output, client, concurrency, age_band, amount_step, progress):
+    profiles = load_profiles(profiles)
+    done = completed_clients(output, with_strategy=client is not None)
+    if client is not None and os.path.exists(output):
+        _drop_unfinished(output, done)
+    todo = profiles[~profiles['client_id'].isin(done)]
+    plans = plan_table(todo)
+    buckets = bucket_profiles(todo, age_band, amount_step)
+    summary = {'profiles': len(profiles), 'skipped': len(profiles) - len(todo),
+               'buckets': 0, 'written': 0, 'failed': 0}
+
+    needs_ai = (plans['surplus'] > 0).to_numpy() & (client is not None)
+    groups = {bucket: rows for bucket, rows in plans[needs_ai].groupby(buckets.loc[needs_ai, 'bucket'])}
+    summary['buckets'] = len(groups)
+
+    # A crash can leave a partial last line; start appending on a fresh one
+    if os.path.exists(output) and os.path.getsize(output):
+        with open(output, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            partial = f.read(1) != b"\n"
+    else:
+        partial = False
+
+    # The pool is shut down by hand: leaving a with-block waits for every
+    # queued request, so an interrupt (Ctrl-C, a Streamlit stop raised from
+    # progress) would hang until the whole batch was sent, then drop it
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        with open(output, 'a') as out:
+            if partial:
+                out.write("\n")
+
+            def write(rows, strategy, bucket=None):
+                for record in rows.to_dict('records'):
+                    record.update(bucket=bucket, strategy=strategy)
+                    out.write(json.dumps(record, default=str) + "\n")
+                out.flush()
+                summary['written'] += len(rows)
+                if progress:
+                    progress(summary['written'] + summary['failed'], len(todo))
+
+            # No surplus or no client: nothing to ask Claude, the row is final
+            write(plans[~needs_ai], None)
+
+            futures = {}
+            for bucket, rows in groups.items():
+                first = buckets.loc[rows.index[0]]
+                prompt = strategy_prompt(first['age'], first['income'], first['expenses'], first['risk'])
+                futures[pool.submit(_strategy, client, prompt)] = (bucket, rows)
+            for future in as_completed(futures):
+                bucket, rows = futures[future]
+                try:
+                    strategy = future.result()
+                except Exception as e:
+                    # Left out of the file, so the next run retries them
+                    perf.record_error('batch.strategy', e)
+                    summary['failed'] += len(rows)
+                    if progress:
+                        progress(summary['written'] + summary['failed'], len(todo))
+                    continue
+                write(rows, strategy, bucket)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate portfolio strategies for a CSV of client profiles")
+    parser.add_argument("profiles", help="CSV with age, income, expenses, risk (and optionally client_id) columns")
+    parser.add_argument("-o", "--output", default="strategies.jsonl", help="JSONL output; reruns resume it")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY, help="parallel Claude requests")
+    parser.add_argument("--age-band", type=int, default=AGE_BAND, help="years of age that share a request")
+    parser.add_argument("--amount-step", type=int, default=AMOUNT_STEP, help="₹ rounding for income/expenses")
+    parser.add_argument("--local-only", action="store_true", help="only compute allocation and projections")
+    args = parser.parse_args(argv)
+
+    client = None
+    if not args.local_only:
+        api_key = os.environ.get("CLAUDE_API_KEY") or os.environ.get("ANTHROPIC_API_KEY")
+        if not api_key:
+            sys.exit("Set CLAUDE_API_KEY (or pass --local-only)")
+        client = get_client(api_key)
+
+    summary = generate(args.profiles, args.output, client, args.concurrency, args.age_band, args.amount_step,
+                       progress=lambda done, total: print(f"\r{done}/{total} clients", end="", file=sys.stderr))
+    print(file=sys.stderr)
+    print(json.dumps(summary))
+    if summary['failed']:
+        sys.exit(f"{summary['failed']} clients failed; rerun the same command to retry them")
+
+
+if __name__ == "__main__":
+    main()
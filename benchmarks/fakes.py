@@ -0,0 +1,160 @@
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import anthropic
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+# Deterministic offline stand-ins for yfinance and the Anthropic client, with
+# injectable latency and failure rates. installed() patches them in process-wide
+# so the app, its background refresher and the AI service all use them.
+
+
+class Upstream:
+    # Latency/failure model and call counters shared by both fakes
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.calls = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def call(self, kind):
+        with self._lock:
+            self.calls[kind] += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.failure_rate
+        time.sleep(delay)
+        return failed
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+
+
+yahoo = Upstream()
+claude = Upstream()
+
+_SESSIONS = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=2600, tz='Asia/Kolkata')
+_PERIOD_SESSIONS = {
+    '1d': 1, '2d': 2, '5d': 5, '1mo': 21, '3mo': 63, '6mo': 126, 'ytd': 200,
+    '1y': 250, '2y': 500, '5y': 1250, '10y': 2500, 'max': 2600,
+}
+
+
+class FakeTicker:
+    def __init__(self, ticker, *args, **kwargs):
+        self.ticker = ticker
+
+    def _bars(self, index):
+        # Same random walk for a symbol on every call, so tail fetches line up
+        rng = np.random.default_rng(zlib.crc32(self.ticker.encode()))
+        close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.012, len(_SESSIONS))))
+        volume = rng.integers(100_000, 5_000_000, len(_SESSIONS))
+        bars = pd.DataFrame({
+            'Open': close * 0.998, 'High': close * 1.01, 'Low': close * 0.99,
+            'Close': close, 'Volume': volume,
+        }, index=_SESSIONS)
+        return bars.loc[index]
+
+    def history(self, period="1mo", interval="1d", start=None, end=None, **kwargs):
+        if yahoo.call('history'):
+            raise ConnectionError(f"Injected yfinance failure for {self.ticker}")
+        if start is not None:
+            index = _SESSIONS[_SESSIONS >= pd.Timestamp(start).tz_localize('Asia/Kolkata')]
+        else:
+            index = _SESSIONS[-_PERIOD_SESSIONS.get(period, 21):]
+        bars = self._bars(index)
+        if interval != "1d":
+            # Intraday requests get evenly spaced bars inside the last session
+            minutes = {'1m': 1, '2m': 2, '5m': 5, '15m': 15, '30m': 30, '60m': 60, '1h': 60}.get(interval, 5)
+            stamps = pd.date_range(_SESSIONS[-1] + pd.Timedelta(hours=9, minutes=15),
+                                   _SESSIONS[-1] + pd.Timedelta(hours=15, minutes=30), freq=f"{minutes}min")
+            close = bars['Close'].iloc[-1] * (1 + np.linspace(-0.005, 0.005, len(stamps)))
+            bars = pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close,
+                                 'Volume': 10_000}, index=stamps)
+        return bars
+
+    @property
+    def info(self):
+        if yahoo.call('info'):
+            raise ConnectionError(f"Injected yfinance failure for {self.ticker}")
+        seed = zlib.crc32(self.ticker.encode())
+        return {
+            'longName': f"{self.ticker.removesuffix('.NS')} Limited",
+            'marketCap': (seed % 900 + 100) * 10 ** 10,
+            'trailingPE': round(10 + seed % 40 + (seed % 10) / 10, 1),
+        }
+
+
+_ANSWER = ("Based on current Indian market conditions, a diversified approach works best. "
+           "Allocate across large-cap index funds, flexi-cap funds and short-duration debt, "
+           "use ELSS for Section 80C, and review the allocation once a year.")
+
+
+def _failure():
+    return anthropic.APIConnectionError(message="Injected Claude failure", request=None)
+
+
+class _FakeStream:
+    def __init__(self, tokens, token_latency):
+        self._tokens = tokens
+        self._token_latency = token_latency
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def text_stream(self):
+        for token in self._tokens:
+            time.sleep(self._token_latency)
+            yield token
+
+
+class _FakeMessages:
+    def __init__(self, token_latency):
+        self._token_latency = token_latency
+
+    def create(self, **kwargs):
+        if claude.call('create'):
+            raise _failure()
+        time.sleep(self._token_latency * len(_ANSWER.split()))
+        return SimpleNamespace(content=[SimpleNamespace(text=_ANSWER)])
+
+    def stream(self, **kwargs):
+        if claude.call('stream'):
+            raise _failure()
+        return _FakeStream([word + " " for word in _ANSWER.split()], self._token_latency)
+
+
+class FakeAnthropic:
+    token_latency = 0.0
+
+    def __init__(self, *args, **kwargs):
+        self.messages = _FakeMessages(self.token_latency)
+
+
+@contextmanager
+def installed(yahoo_latency=0.0, claude_latency=0.0, token_latency=0.0, jitter=0.0, failure_rate=0.0, seed=0):
+    # Patches yf.Ticker and anthropic.Anthropic for the duration of the block
+    yahoo.latency, yahoo.jitter, yahoo.failure_rate = yahoo_latency, jitter, failure_rate
+    claude.latency, claude.jitter, claude.failure_rate = claude_latency, jitter, failure_rate
+    yahoo._random.seed(seed)
+    claude._random.seed(seed + 1)
+    FakeAnthropic.token_latency = token_latency
+    saved = yf.Ticker, anthropic.Anthropic
+    yf.Ticker, anthropic.Anthropic = FakeTicker, FakeAnthropic
+    try:
+        yield
+    finally:
+        yf.Ticker, anthropic.Anthropic = saved
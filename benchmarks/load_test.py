@@ -0,0 +1,250 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+from urllib import parse
+
+import numpy as np
+
+# Load test for streamlit_app.py with offline yfinance/Anthropic fakes.
+# Drives N concurrent simulated sessions through every view headlessly and
+# reports render-time percentiles, upstream calls per rerun and memory per
+# session.
+#
+#   python -m benchmarks.load_test --sessions 50 --yahoo-latency 0.3 --claude-latency 1
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "streamlit_app.py")
+FAKE_API_KEY = "sk-ant-benchmark"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test streamlit_app.py against offline fakes")
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent simulated sessions")
+    parser.add_argument("--yahoo-latency", type=float, default=0.2, help="seconds per yfinance call")
+    parser.add_argument("--claude-latency", type=float, default=0.5, help="seconds before Claude responds")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds per streamed token")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra uniform random latency (seconds)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of upstream calls that fail")
+    parser.add_argument("--memory-sessions", type=int, default=10, help="sessions to measure memory with (0 to skip)")
+    parser.add_argument("--refresh-interval", type=float, default=3600,
+                        help="background refresh interval; the default keeps refreshes out of the measurement")
+    parser.add_argument("--timeout", type=float, default=120, help="per-rerun timeout (seconds)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args, workdir):
+    # Must run before the app modules are imported: they read these at import
+    os.environ["AI_CACHE_PATH"] = os.path.join(workdir, "ai_responses.sqlite3")
+    os.environ["OHLCV_STORE_DIR"] = os.path.join(workdir, "ohlcv")
+    os.environ["MARKET_REFRESH_INTERVAL"] = str(args.refresh_interval)
+    os.environ["MARKET_REFRESH_OFF_HOURS_INTERVAL"] = str(args.refresh_interval)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+
+def install_runtime():
+    # AppTest installs and tears down a mock Runtime and st.secrets around
+    # every run, which races when sessions run concurrently. Install them once
+    # instead; one shared cache storage also matches a real server process.
+    import streamlit as st
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.secrets import Secrets
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+
+    secrets = Secrets([])
+    secrets._secrets = {"CLAUDE_API_KEY": FAKE_API_KEY}
+    st.secrets = secrets
+
+
+def session_class():
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import AppTest
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    # Each runner would otherwise compile the script itself; concurrent
+    # compile() calls are not thread-safe on CPython 3.11, and a real server
+    # compiles once per process anyway
+    script_cache = ScriptCache()
+
+    class SharedRuntimeAppTest(AppTest):
+        def _run(self, widget_state=None, timeout=None):
+            script_runner = LocalScriptRunner(self._script_path, self.session_state, args=self.args, kwargs=self.kwargs)
+            script_runner._script_cache = script_cache
+            self._tree = script_runner.run(widget_state, self.query_params, timeout or self.default_timeout)
+            self._tree._runner = self
+            query_string = script_runner.event_data[-1]["client_state"].query_string
+            self.query_params = parse.parse_qs(query_string)
+            return self
+
+    return SharedRuntimeAppTest
+
+
+def _button(at, text):
+    return next(button for button in at.button if text in button.label)
+
+
+def _view(at, label):
+    return at.radio(key="view").set_value(next(view for view in at.radio(key="view").options if label in view))
+
+
+# (step, view, interaction): each interaction sets up widget state and is
+# followed by one timed rerun, as a browser event would be
+SCENARIO = [
+    ("initial load", "AI Assistant", lambda at: None),
+    ("stock symbol", "AI Assistant", lambda at: at.text_input(key="analyze_symbol").input("TCS")),
+    ("analyze stock", "AI Assistant", lambda at: _button(at, "Analyze TCS").click()),
+    ("SIP strategy", "AI Assistant", lambda at: _button(at, "SIP Strategy").click()),
+    ("free-text question", "AI Assistant", lambda at: at.text_input(key="advisor_query").input("Is gold a good hedge right now?")),
+    ("open market data", "Market Data", lambda at: _view(at, "Market Data")),
+    ("chart range: 5Y", "Market Data", lambda at: at.radio(key="nifty_range").set_value("5Y")),
+    ("movers: losers", "Market Data", lambda at: at.radio(key="movers_view").set_value("Losers")),
+    ("lookback: 1M", "Market Data", lambda at: at.selectbox(key="movers_lookback").set_value("1M")),
+    ("open planner", "Portfolio Planner", lambda at: _view(at, "Portfolio Planner")),
+    ("age slider", "Portfolio Planner", lambda at: at.slider(key="age").set_value(42)),
+    ("generate strategy", "Portfolio Planner", lambda at: _button(at, "Generate AI Strategy").click()),
+]
+
+def run_session(app_test, timeout):
+    at = app_test(APP, default_timeout=timeout)
+    timings, errors = [], []
+    for step, view, interact in SCENARIO:
+        try:
+            interact(at)
+            started = time.perf_counter()
+            at.run()
+            timings.append((view, step, time.perf_counter() - started))
+            errors.extend(f"{step}: {exc.message}" for exc in at.exception)
+        except Exception as exc:
+            errors.append(f"{step}: {exc!r}")
+    return at, timings, errors
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'p50': p50, 'p95': p95, 'p99': p99, 'max': max(values), 'n': len(values)}
+
+
+def measure_memory(app_test, sessions, timeout):
+    # Allocations retained per finished session (its session state and
+    # element tree), after shared caches were warmed by the latency phase
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    kept = [run_session(app_test, timeout)[0] for _ in range(sessions)]
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del kept
+    return retained / sessions
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # plotly 5.17 warns about a pandas deprecation on every figure
+    warnings.filterwarnings("ignore", category=FutureWarning)
+    workdir = tempfile.mkdtemp(prefix="wealth-bench-")
+    configure_environment(args, workdir)
+
+    from benchmarks import fakes
+
+    with fakes.installed(args.yahoo_latency, args.claude_latency, args.token_latency,
+                         args.jitter, args.failure_rate, args.seed):
+        import market_refresher
+        import perf
+
+        install_runtime()
+        app_test = session_class()
+
+        # Warm-up: let the background refresher publish its first snapshot so
+        # sessions measure the steady state, then count only session traffic
+        market_refresher.start()
+        if market_refresher.latest(wait=args.timeout) is None:
+            sys.exit("Background refresher did not publish a snapshot")
+        fakes.yahoo.reset()
+        fakes.claude.reset()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+            results = list(pool.map(lambda _: run_session(app_test, args.timeout), range(args.sessions)))
+        wall = time.perf_counter() - started
+
+        timings = [t for _, session_timings, _ in results for t in session_timings]
+        errors = [e for _, _, session_errors in results for e in session_errors]
+        reruns = len(timings)
+        upstream = {
+            'yfinance.history': fakes.yahoo.calls['history'],
+            'yfinance.info': fakes.yahoo.calls['info'],
+            'anthropic.create': fakes.claude.calls['create'],
+            'anthropic.stream': fakes.claude.calls['stream'],
+        }
+        # Where render time went, per instrumented stage (process-wide, so
+        # this includes the background refresher)
+        spans = perf.span_summary()
+        del results
+
+        memory = measure_memory(app_test, args.memory_sessions, args.timeout) if args.memory_sessions else None
+
+    report = {
+        'sessions': args.sessions,
+        'reruns': reruns,
+        'wall_seconds': wall,
+        'render_seconds': {
+            'all': percentiles([t for _, _, t in timings]),
+            **{view: percentiles([t for view_, _, t in timings if view_ == view])
+               for view in dict.fromkeys(view for _, view, _ in SCENARIO)},
+        },
+        'steps': {step: percentiles([t for _, step_, t in timings if step_ == step]) for step, _, _ in SCENARIO},
+        'upstream_calls': upstream,
+        'upstream_calls_per_rerun': {k: v / reruns if reruns else 0.0 for k, v in upstream.items()},
+        'spans': spans,
+        'memory_per_session_bytes': memory,
+        'errors': errors,
+    }
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, default=float)
+    return report
+
+
+def print_report(report):
+    print(f"{report['sessions']} concurrent sessions, {report['reruns']} reruns in {report['wall_seconds']:.1f}s")
+    print(f"\n{'Render time (s)':<28}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}")
+    for section in ('render_seconds', 'steps'):
+        for name, stats in report[section].items():
+            if stats:
+                print(f"  {name:<26}{stats['p50']:8.3f}{stats['p95']:8.3f}{stats['p99']:8.3f}{stats['max']:8.3f}")
+        print()
+    print("Upstream calls per rerun")
+    for name, per_rerun in report['upstream_calls_per_rerun'].items():
+        print(f"  {name:<26}{per_rerun:8.3f}  ({report['upstream_calls'][name]} total)")
+    print(f"\n{'Stage (s)':<28}{'count':>8}{'mean':>8}{'p95':>8}{'max':>8}")
+    for row in report['spans']:
+        print(f"  {row['span']:<26}{row['count']:8d}{row['mean_s']:8.3f}{row['p95_s']:8.3f}{row['max_s']:8.3f}")
+    if report['memory_per_session_bytes'] is not None:
+        print(f"\nMemory retained per session: {report['memory_per_session_bytes'] / 2 ** 20:.2f} MiB")
+    if report['errors']:
+        print(f"\n{len(report['errors'])} errors, first: {report['errors'][0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import os
+
+import numpy as np
+import plotly.graph_objects as go
+
+import market_refresher
+import perf
+from market_cache import TTLCache
+from market_fetcher import FETCH_TIMEOUT, fetch_histories
+
+# Price charts for selectable ranges. Series are downsampled server-side with
+# LTTB to a fixed point budget, and finished figures are cached per
+# (symbol, range, data version), so an interaction elsewhere on the page
+# neither rebuilds the figure nor ships thousands of points to the browser.
+
+# Range label -> (yfinance period, interval)
+RANGES = {
+    '1D': ('1d', '5m'),
+    '5D': ('5d', '15m'),
+    '1M': ('1mo', '1d'),
+    '6M': ('6mo', '1d'),
+    '1Y': ('1y', '1d'),
+    '5Y': ('5y', '1d'),
+    '10Y': ('10y', '1d'),
+}
+POINT_BUDGET = int(os.environ.get("CHART_POINTS", 500))
+FIGURE_TTL = float(os.environ.get("CHART_FIGURE_TTL", 15 * 60))
+
+_figures = TTLCache(FIGURE_TTL, 64, name='figures')
+_figures.register_metrics('figures')
+
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: indices of `threshold` points that keep
+    # the visual shape of (x, y); first and last points are always kept
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    # threshold - 2 buckets between the fixed first and last points
+    edges = (np.arange(threshold - 1) * (n - 2) // (threshold - 2)) + 1
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        following = slice(edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x, avg_y = x[following].mean(), y[following].mean()
+        # Twice the triangle area between the last kept point, each candidate
+        # and the next bucket's average
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def downsample(series, budget=POINT_BUDGET):
+    series = series.dropna()
+    if len(series) <= budget:
+        return series
+    x = series.index.asi8.astype(np.float64)
+    return series.iloc[lttb(x, series.to_numpy(dtype=np.float64), budget)]
+
+
+def range_history(symbol, chart_range, snapshot=None):
+    # The background snapshot already holds 6 months of daily bars; other
+    # ranges go through the shared caches (intraday bars expire with quotes).
+    # Raises LookupError when the range could not be loaded.
+    period, interval = RANGES[chart_range]
+    if snapshot is not None and (period, interval) == (market_refresher.HISTORY_PERIOD, '1d'):
+        hist = snapshot['histories'].get(symbol)
+        if hist is not None:
+            return hist
+    histories, errors = fetch_histories([symbol], period=period, interval=interval, timeout=FETCH_TIMEOUT)
+    if symbol not in histories:
+        raise LookupError(errors.get(symbol, "no data"))
+    return histories[symbol]
+
+
+def _build(name, chart_range, hist):
+    close = downsample(hist['Close'])
+    fig = go.Figure(go.Scatter(x=close.index, y=close.to_numpy(), mode='lines', name=name,
+                               line=dict(color='#667eea', width=2)))
+    fig.update_layout(
+        title=f'{name} - {chart_range}',
+        xaxis_title="Time" if RANGES[chart_range][1] != '1d' else "Date",
+        yaxis_title="Price",
+        showlegend=False
+    )
+    return fig, len(close)
+
+
+def price_chart(symbol, name, chart_range, hist):
+    # (figure, points plotted); cached on the data's last bar and length, so
+    # a refreshed history produces a new figure
+    version = (hist.index[-1], len(hist), float(hist['Close'].iloc[-1]))
+
+    def build():
+        with perf.span('chart.build'):
+            return _build(name, chart_range, hist)
+
+    return _figures.get_or_load((symbol, chart_range, version), build)
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import yfinance as yf
+
+import perf
+from market_cache import INFO_MAX_ENTRIES, INFO_TTL, TTLCache
+
+# Company name, market cap and PE for any number of symbols. Lookups run on
+# one event loop per process with bounded parallelism; only those three
+# fields are cached (on the long info TTL, in their own cache so histories
+# never evict them), not the whole Ticker.info dict.
+# A lookup that outlives the caller's timeout keeps running and lands in the
+# cache, and concurrent requests for the same symbol share one lookup.
+# Symbols with no listing are cached as not found for the same TTL. The
+# refresher's universe-wide lookups run on their own, smaller pool, so an
+# interactive lookup never queues behind them.
+
+CONCURRENCY = int(os.environ.get("FUNDAMENTALS_CONCURRENCY", 8))
+BACKGROUND_CONCURRENCY = int(os.environ.get("FUNDAMENTALS_BACKGROUND_CONCURRENCY", 4))
+FETCH_TIMEOUT = float(os.environ.get("MARKET_FETCH_TIMEOUT", 10))
+
+_loop = None
+_loop_lock = threading.Lock()
+# Keyed on background: False for page renders, True for the refresher
+_semaphores = {False: asyncio.Semaphore(CONCURRENCY), True: asyncio.Semaphore(BACKGROUND_CONCURRENCY)}
+_executors = {
+    False: ThreadPoolExecutor(max_workers=CONCURRENCY, thread_name_prefix="fundamentals"),
+    True: ThreadPoolExecutor(max_workers=BACKGROUND_CONCURRENCY, thread_name_prefix="fundamentals-refresh"),
+}
+_inflight = {}
+
+cache = TTLCache(INFO_TTL, INFO_MAX_ENTRIES, name='fundamentals')
+cache.register_metrics('fundamentals')
+
+
+def nse_symbol(ticker):
+    # "hdfcbank " -> "HDFCBANK.NS"; indices and other exchanges pass through
+    ticker = ticker.strip().upper()
+    return ticker if ticker.startswith('^') or '.' in ticker else f"{ticker}.NS"
+
+
+def _service_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="fundamentals", daemon=True).start()
+        return _loop
+
+
+def _load(symbol):
+    with perf.span('yfinance.info'):
+        info = yf.Ticker(symbol).info or {}
+    # yfinance answers unknown symbols with a near-empty dict, not an error
+    company = info.get('longName') or info.get('shortName')
+    if not company and info.get('marketCap') is None:
+        raise LookupError(f"No listing found for {symbol}")
+    return {
+        'company': company or symbol,
+        'market_cap': info.get('marketCap'),
+        'pe_ratio': info.get('trailingPE'),
+    }
+
+
+async def _fetch(symbol, background):
+    try:
+        async with _semaphores[background]:
+            fundamentals = await asyncio.get_running_loop().run_in_executor(_executors[background], _load, symbol)
+        cache.set(symbol, fundamentals)
+        return fundamentals
+    except LookupError as e:
+        cache.set(symbol, _error(e))
+        raise
+    finally:
+        _inflight.pop((symbol, background), None)
+
+
+def _error(exc):
+    if isinstance(exc, LookupError):
+        return {'kind': 'not_found', 'message': str(exc)}
+    return {'kind': 'upstream', 'message': f"{type(exc).__name__}: {exc}"}
+
+
+async def fetch_fundamentals_async(symbols, timeout=FETCH_TIMEOUT, background=False):
+    # Must run on the service loop (see fetch_fundamentals). Returns
+    # (fundamentals, errors): {symbol: {company, market_cap, pe_ratio}} and
+    # {symbol: {kind: 'not_found' | 'upstream' | 'timeout', message}}.
+    results, errors, tasks = {}, {}, {}
+    for symbol in dict.fromkeys(symbols):
+        cached = cache.get(symbol)
+        if cached is not None:
+            if cached.get('kind') == 'not_found':
+                errors[symbol] = cached
+            else:
+                results[symbol] = cached
+            continue
+        key = (symbol, background)
+        if key not in _inflight:
+            _inflight[key] = asyncio.ensure_future(_fetch(symbol, background))
+        tasks[symbol] = _inflight[key]
+    if tasks:
+        await asyncio.wait(set(tasks.values()), timeout=timeout)
+
+    for symbol, task in tasks.items():
+        if not task.done():
+            errors[symbol] = {'kind': 'timeout', 'message': f"timed out after {timeout:g}s"}
+        elif task.exception() is not None:
+            errors[symbol] = _error(task.exception())
+            if errors[symbol]['kind'] == 'upstream':
+                perf.record_error('fundamentals', task.exception())
+        else:
+            results[symbol] = task.result()
+    return results, errors
+
+
+def submit_fundamentals(symbols, timeout=FETCH_TIMEOUT, background=False):
+    # Starts the lookups and returns a concurrent.futures.Future of
+    # (fundamentals, errors), so callers can fetch other data meanwhile.
+    # background=True is for the refresher.
+    coro = fetch_fundamentals_async(list(symbols), timeout, background)
+    return asyncio.run_coroutine_threadsafe(coro, _service_loop())
+
+
+def fetch_fundamentals(symbols, timeout=FETCH_TIMEOUT, background=False):
+    # Blocking entry point for Streamlit reruns and the refresher thread
+    return submit_fundamentals(symbols, timeout, background).result()
+
@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+import ohlcv_store
+import perf
+from market_universe import load_universe
+from singleflight import SingleFlight
+
+# Process-wide market data cache. Streamlit re-executes streamlit_app.py on
+# every rerun but imports this module once per process, so every session
+# shares the same cache and pays one upstream fetch per key per TTL window.
+
+QUOTE_TTL = float(os.environ.get("MARKET_CACHE_TTL", 60))
+INFO_TTL = float(os.environ.get("MARKET_INFO_TTL", 6 * 60 * 60))
+# Sized from the universe so a refresh (one history per universe symbol)
+# does not evict the quotes and chart ranges fetched on demand, or itself
+UNIVERSE_SIZE = len(load_universe())
+MAX_ENTRIES = int(os.environ.get("MARKET_CACHE_MAX_ENTRIES") or 2 * UNIVERSE_SIZE + 256)
+INFO_MAX_ENTRIES = int(os.environ.get("MARKET_INFO_MAX_ENTRIES") or UNIVERSE_SIZE + 256)
+
+
+class TTLCache:
+    def __init__(self, ttl, max_entries, name='cache'):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight(name)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def _peek(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            return entry[1] if entry is not None and entry[0] > time.monotonic() else None
+
+    def get_or_load(self, key, loader, ttl=None):
+        # Concurrent misses for the same key share one loader call
+        def load():
+            value = self._peek(key)
+            if value is None:
+                value = loader()
+                if value is not None:
+                    self.set(key, value, ttl)
+            return value
+
+        value = self.get(key)
+        if value is None:
+            value = self._flights.do(key, load)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            size = len(self._data)
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': size,
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+        }
+
+    def register_metrics(self, label):
+        # Exports hits, misses and size, labelled cache=<label>
+        def collect():
+            stats = self.stats()
+            return [
+                ('cache_hits_total', {'cache': label}, stats['hits']),
+                ('cache_misses_total', {'cache': label}, stats['misses']),
+                ('cache_size', {'cache': label}, stats['size']),
+            ]
+
+        perf.register_collector(collect)
+
+
+cache = TTLCache(QUOTE_TTL, MAX_ENTRIES, name='market')
+cache.register_metrics('market')
+
+
+def compact_frame(frame, columns=None):
+    # float32 copy backed by one read-only array, for frames shared by every
+    # session: half the memory of float64, and in-place edits raise instead
+    # of leaking into other sessions. Already-compact frames are returned as is.
+    if columns is not None:
+        columns = [c for c in columns if c in frame.columns]
+        # Subsetting always copies, so only do it when it drops something
+        if columns != list(frame.columns):
+            frame = frame[columns]
+    values = frame.to_numpy(dtype=np.float32)
+    if np.shares_memory(values, frame.to_numpy()) and not values.flags.writeable:
+        return frame
+    values.flags.writeable = False
+    return pd.DataFrame(values, index=frame.index, columns=frame.columns, copy=False)
+
+
+def get_history(symbol, period="1d", interval="1d"):
+    # Daily bars come from the local OHLCV store, which only downloads the
+    # missing tail. Empty frames are not cached so a failed fetch is retried.
+    def load():
+        if interval == "1d":
+            hist = ohlcv_store.history(symbol, period)
+        else:
+            with perf.span('yfinance.history'):
+                hist = yf.Ticker(symbol).history(period=period, interval=interval)
+        return None if hist is None or hist.empty else compact_frame(hist, ohlcv_store.COLUMNS)
+
+    return cache.get_or_load(('history', symbol, period, interval), load)
+
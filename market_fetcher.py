@@ -0,0 +1,107 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import ohlcv_store
+import perf
+from fundamentals import nse_symbol, submit_fundamentals
+from market_cache import get_history
+from singleflight import SingleFlight
+
+# Fetches every symbol a page render needs in one bounded fan-out, so the
+# render waits for the slowest symbol instead of the sum of all of them.
+# The background refresher fans out over the whole universe on its own pool,
+# so requests from a page never queue behind it.
+
+MAX_WORKERS = int(os.environ.get("MARKET_FETCH_WORKERS", 8))
+REFRESH_WORKERS = int(os.environ.get("MARKET_REFRESH_WORKERS", MAX_WORKERS))
+FETCH_TIMEOUT = float(os.environ.get("MARKET_FETCH_TIMEOUT", 10))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="market-fetch")
+_background = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="market-refresh")
+_stock_flights = SingleFlight('stocks')
+
+
+def fetch_histories(symbols, period="6mo", interval="1d", timeout=FETCH_TIMEOUT, background=False):
+    # Returns (histories, errors): {symbol: DataFrame} for every symbol that
+    # loaded and {symbol: message} for the ones that failed or timed out.
+    # A timed-out fetch keeps running and lands in the cache for the next render;
+    # meanwhile daily bars already in the local store are served instead, if
+    # they cover the whole period. background=True is for the refresher.
+    executor = _background if background else _executor
+    futures = {
+        symbol: executor.submit(get_history, symbol, period, interval)
+        for symbol in dict.fromkeys(symbols)
+    }
+    wait(futures.values(), timeout=timeout)
+
+    histories, errors = {}, {}
+    for symbol, future in futures.items():
+        if future.done() and future.exception() is None and future.result() is not None:
+            histories[symbol] = future.result()
+            continue
+        if not future.done():
+            perf.count('fetch_timeouts', stage='history')
+        elif future.exception() is not None:
+            perf.record_error('history', future.exception())
+        # Slow or failing upstream: fall back to the daily bars on disk
+        stored = ohlcv_store.stored_history(symbol, period) if interval == "1d" else None
+        if stored is not None:
+            histories[symbol] = stored
+            perf.count('stored_fallbacks', stage='history')
+        elif not future.done():
+            errors[symbol] = f"timed out after {timeout:g}s"
+        elif future.exception() is not None:
+            errors[symbol] = str(future.exception())
+        else:
+            errors[symbol] = "no data"
+    return histories, errors
+
+
+def quote_from_history(hist):
+    # Latest close and day change derived from any daily history, so the
+    # 2-day quote does not need its own round-trip
+    if hist is None or len(hist) < 2:
+        return None
+    current = float(hist['Close'].iloc[-1])
+    prev = float(hist['Close'].iloc[-2])
+    change = current - prev
+    return current, change, (change / prev) * 100
+
+
+def fetch_stocks(symbols, timeout=FETCH_TIMEOUT, background=False):
+    # Price and fundamentals for NSE symbols ("HDFCBANK"), fetched at the same
+    # time. Returns (stocks, errors); errors are {symbol: {kind, message}} as
+    # reported by the fundamentals service, or kind 'price' for a missing quote.
+    # Prices of symbols the fundamentals service did not find are dropped; when
+    # the lookup only failed or timed out, the price is returned with 'N/A'
+    # fundamentals and the error.
+    tickers = {symbol: nse_symbol(symbol) for symbol in symbols}
+    pending = submit_fundamentals(tickers.values(), timeout=timeout, background=background)
+    histories, history_errors = fetch_histories(tickers.values(), period="1d", timeout=timeout, background=background)
+    fundamentals, fundamental_errors = pending.result()
+
+    stocks, errors = {}, {}
+    for symbol, ticker in tickers.items():
+        error = fundamental_errors.get(ticker)
+        if error is not None and error['kind'] == 'not_found':
+            errors[symbol] = error
+        elif ticker not in histories:
+            errors[symbol] = {'kind': 'price', 'message': history_errors.get(ticker, "no price data")}
+        else:
+            if error is not None:
+                errors[symbol] = error
+            info = fundamentals.get(ticker, {'company': symbol, 'market_cap': None, 'pe_ratio': None})
+            stocks[symbol] = {
+                'price': float(histories[ticker]['Close'].iloc[-1]),
+                'company': info['company'],
+                'market_cap': info['market_cap'] if info['market_cap'] is not None else 'N/A',
+                'pe_ratio': info['pe_ratio'] if info['pe_ratio'] is not None else 'N/A'
+            }
+    return stocks, errors
+
+
+def fetch_stock(symbol, timeout=FETCH_TIMEOUT):
+    # One symbol as (stock data, error). Simultaneous requests for the same
+    # symbol, e.g. many sessions pressing Analyze at once, share one fetch.
+    stocks, errors = _stock_flights.do(symbol, lambda: fetch_stocks([symbol], timeout))
+    return stocks.get(symbol), errors.get(symbol)
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+# Vectorized movers over a whole universe. Histories are aligned once into
+# date x symbol matrices; every ranking after that is a handful of array ops.
+
+LOOKBACKS = {'1D': 1, '1W': 5, '1M': 21, '3M': 63}
+VOLUME_WINDOW = 20
+
+
+def price_matrix(histories, field='Close'):
+    # Aligned date x symbol matrix; sessions missing for a symbol stay NaN
+    columns = {symbol: hist[field] for symbol, hist in histories.items() if field in hist}
+    if not columns:
+        return pd.DataFrame()
+    matrix = pd.concat(columns, axis=1).sort_index()
+    matrix.index = matrix.index.normalize()
+    return matrix[~matrix.index.duplicated(keep='last')]
+
+
+def returns(closes, lookbacks=LOOKBACKS):
+    # Percent change over each lookback, measured from every symbol's own last
+    # close so a symbol that missed the latest session is not dropped
+    filled = closes.ffill().to_numpy()
+    last = filled[-1]
+    result = {}
+    for label, sessions in lookbacks.items():
+        if len(filled) > sessions:
+            result[label] = (last / filled[-1 - sessions] - 1) * 100
+        else:
+            result[label] = np.full(len(last), np.nan)
+    return pd.DataFrame(result, index=closes.columns)
+
+
+def volume_ratio(volumes, window=VOLUME_WINDOW):
+    # Latest session's volume relative to its trailing average
+    values = volumes.to_numpy(dtype=float)
+    if len(values) < 2:
+        return pd.Series(np.nan, index=volumes.columns)
+    trailing = np.nanmean(values[-1 - window:-1], axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = values[-1] / trailing
+    return pd.Series(ratio, index=volumes.columns)
+
+
+def movers(closes, volumes, kind='gainers', lookback='1D', n=5):
+    # kind: 'gainers', 'losers' or 'volume'. Returns numeric columns; callers
+    # format only at display time.
+    table = returns(closes)
+    table.insert(0, 'Price', closes.ffill().iloc[-1])
+    table['Volume x'] = volume_ratio(volumes.reindex(columns=closes.columns)) if not volumes.empty else np.nan
+    if kind == 'volume':
+        table = table.dropna(subset=['Volume x']).nlargest(n, 'Volume x')
+    else:
+        table = table.dropna(subset=[lookback])
+        table = table.nlargest(n, lookback) if kind == 'gainers' else table.nsmallest(n, lookback)
+    table.index = table.index.str.replace('.NS', '', regex=False)
+    return table.rename_axis('Stock').reset_index()
@@ -0,0 +1,153 @@
+import datetime
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+from zoneinfo import ZoneInfo
+
+import ohlcv_store
+import perf
+from fundamentals import submit_fundamentals
+from market_cache import compact_frame
+from market_fetcher import fetch_histories, fetch_stocks
+from market_rankings import price_matrix
+from market_universe import load_universe
+from sector_breadth import market_breadth, sector_breadth
+
+# Background market data refresh. One daemon thread per process keeps a
+# snapshot of everything the Market Data tab and the stock analysis need
+# (indices, the ranking universe, sector breadth, stock fundamentals);
+# renders only read the latest snapshot and never wait on the network.
+
+INDEX_SYMBOLS = ["^NSEI", "^BSESN", "^NSEBANK", "^CNXIT"]
+UNIVERSE = load_universe()
+STOCK_SYMBOLS = ["HDFCBANK"]
+HISTORY_PERIOD = "6mo"
+
+MARKET_HOURS_INTERVAL = float(os.environ.get("MARKET_REFRESH_INTERVAL", 60))
+OFF_HOURS_INTERVAL = float(os.environ.get("MARKET_REFRESH_OFF_HOURS_INTERVAL", 15 * 60))
+# A cold NIFTY 500 download takes a while; stragglers finish in the
+# background and are picked up by the next refresh
+REFRESH_TIMEOUT = float(os.environ.get("MARKET_REFRESH_TIMEOUT", 120))
+
+IST = ZoneInfo("Asia/Kolkata")
+MARKET_OPEN = datetime.time(9, 15)
+MARKET_CLOSE = datetime.time(15, 30)
+
+logger = logging.getLogger(__name__)
+
+_snapshot = None
+_snapshot_ready = threading.Event()
+_start_lock = threading.Lock()
+_thread = None
+
+
+def market_open(now=None):
+    # NSE cash session, Monday to Friday (exchange holidays are not modelled)
+    now = now or datetime.datetime.now(IST)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() <= MARKET_CLOSE
+
+
+def refresh_interval(now=None):
+    return MARKET_HOURS_INTERVAL if market_open(now) else OFF_HOURS_INTERVAL
+
+
+def _publish(histories, errors, stocks, market_caps, updated_at):
+    # Universe prices are aligned into matrices, and sector breadth computed,
+    # once per refresh so the render path only reads precomputed results.
+    # The snapshot is the one copy every session reads: frames are compact
+    # and read-only, mappings immutable, and a refresh replaces it whole.
+    global _snapshot
+    histories = {symbol: compact_frame(hist, ohlcv_store.COLUMNS) for symbol, hist in histories.items()}
+    universe = {symbol: hist for symbol, hist in histories.items() if symbol in UNIVERSE}
+    closes = compact_frame(price_matrix(universe, 'Close'))
+    volumes = compact_frame(price_matrix(universe, 'Volume'))
+    snapshot = {
+        'histories': MappingProxyType(histories),
+        'errors': MappingProxyType(errors),
+        'stocks': MappingProxyType(stocks),
+        'closes': closes,
+        'volumes': volumes,
+        'sectors': sector_breadth(closes, UNIVERSE, market_caps),
+        'breadth': market_breadth(closes),
+        'updated_at': updated_at,
+    }
+    frames = list(histories.values()) + [closes, volumes, snapshot['sectors']]
+    snapshot['nbytes'] = sum(int(frame.memory_usage(deep=True).sum()) for frame in frames)
+    _snapshot = MappingProxyType(snapshot)
+    _snapshot_ready.set()
+
+
+def refresh():
+    # Fundamentals are looked up while the histories load, not after them
+    pending = submit_fundamentals(UNIVERSE, timeout=REFRESH_TIMEOUT, background=True)
+    histories, errors = fetch_histories(INDEX_SYMBOLS + list(UNIVERSE), period=HISTORY_PERIOD,
+                                        timeout=REFRESH_TIMEOUT, background=True)
+    stocks, _ = fetch_stocks(STOCK_SYMBOLS, timeout=REFRESH_TIMEOUT, background=True)
+    fundamentals, _ = pending.result()
+    market_caps = {symbol: info['market_cap'] for symbol, info in fundamentals.items()
+                   if isinstance(info['market_cap'], (int, float))}
+    _publish(histories, errors, stocks, market_caps, time.time())
+
+
+def _seed_from_disk():
+    # Serve the last stored bars straight away after a restart, before the
+    # first network refresh completes. Stock fundamentals are not stored.
+    histories = {}
+    for symbol in INDEX_SYMBOLS + list(UNIVERSE):
+        try:
+            stored = ohlcv_store.stored_history(symbol, HISTORY_PERIOD)
+        except Exception:
+            logger.exception("Failed to read stored bars for %s", symbol)
+            continue
+        if stored is not None:
+            histories[symbol] = stored
+    if histories:
+        updated_at = min(ohlcv_store.stored_at(symbol) for symbol in histories)
+        _publish(histories, {}, {}, {}, updated_at)
+
+
+def _run():
+    # Seeding reads a file per symbol, so it runs here rather than in start():
+    # sessions arriving meanwhile wait in latest() instead of on the lock
+    try:
+        _seed_from_disk()
+    except Exception:
+        logger.exception("Failed to seed market data from disk")
+    while True:
+        try:
+            with perf.span('market.refresh'):
+                refresh()
+        except Exception as e:
+            perf.count('upstream_errors', stage='refresh', error=type(e).__name__)
+            logger.exception("Market data refresh failed")
+        time.sleep(refresh_interval())
+
+
+def start():
+    # Idempotent; safe to call on every Streamlit rerun
+    global _thread
+    with _start_lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="market-refresher", daemon=True)
+            _thread.start()
+
+
+def latest(wait=0):
+    # The most recent snapshot, or None if the first refresh has not finished
+    # within `wait` seconds
+    if _snapshot is None and wait:
+        _snapshot_ready.wait(wait)
+    return _snapshot
+
+
+def snapshot_age(snapshot):
+    return time.time() - snapshot['updated_at']
+
+
+def _snapshot_metrics():
+    return [('snapshot_bytes', {}, _snapshot['nbytes'])] if _snapshot is not None else []
+
+
+perf.register_collector(_snapshot_metrics)
@@ -0,0 +1,75 @@
+import os
+
+import pandas as pd
+
+# Stock universe for rankings and sector breadth: Yahoo symbol -> NSE industry.
+# The built-in list is the NIFTY 50; NSE reconstitutes it twice a year, so
+# point MARKET_UNIVERSE_FILE at an index constituents CSV downloaded from
+# niftyindices.com (e.g. ind_nifty500list.csv) to use a current or larger
+# universe.
+
+UNIVERSE_FILE = os.environ.get("MARKET_UNIVERSE_FILE")
+
+NIFTY_50 = {
+    'ADANIENT': "Metals & Mining",
+    'ADANIPORTS': "Services",
+    'APOLLOHOSP': "Healthcare",
+    'ASIANPAINT': "Consumer Durables",
+    'AXISBANK': "Financial Services",
+    'BAJAJ-AUTO': "Automobile and Auto Components",
+    'BAJFINANCE': "Financial Services",
+    'BAJAJFINSV': "Financial Services",
+    'BEL': "Capital Goods",
+    'BHARTIARTL': "Telecommunication",
+    'CIPLA': "Healthcare",
+    'COALINDIA': "Oil Gas & Consumable Fuels",
+    'DRREDDY': "Healthcare",
+    'EICHERMOT': "Automobile and Auto Components",
+    'ETERNAL': "Consumer Services",
+    'GRASIM': "Construction Materials",
+    'HCLTECH': "Information Technology",
+    'HDFCBANK': "Financial Services",
+    'HDFCLIFE': "Financial Services",
+    'HEROMOTOCO': "Automobile and Auto Components",
+    'HINDALCO': "Metals & Mining",
+    'HINDUNILVR': "Fast Moving Consumer Goods",
+    'ICICIBANK': "Financial Services",
+    'INDUSINDBK': "Financial Services",
+    'INFY': "Information Technology",
+    'ITC': "Fast Moving Consumer Goods",
+    'JIOFIN': "Financial Services",
+    'JSWSTEEL': "Metals & Mining",
+    'KOTAKBANK': "Financial Services",
+    'LT': "Construction",
+    'M&M': "Automobile and Auto Components",
+    'MARUTI': "Automobile and Auto Components",
+    'NESTLEIND': "Fast Moving Consumer Goods",
+    'NTPC': "Power",
+    'ONGC': "Oil Gas & Consumable Fuels",
+    'POWERGRID': "Power",
+    'RELIANCE': "Oil Gas & Consumable Fuels",
+    'SBILIFE': "Financial Services",
+    'SBIN': "Financial Services",
+    'SHRIRAMFIN': "Financial Services",
+    'SUNPHARMA': "Healthcare",
+    'TATACONSUM': "Fast Moving Consumer Goods",
+    'TATAMOTORS': "Automobile and Auto Components",
+    'TATASTEEL': "Metals & Mining",
+    'TCS': "Information Technology",
+    'TECHM': "Information Technology",
+    'TITAN': "Consumer Durables",
+    'TRENT': "Consumer Services",
+    'ULTRACEMCO': "Construction Materials",
+    'WIPRO': "Information Technology",
+}
+
+
+def load_universe(path=UNIVERSE_FILE):
+    # Returns {'RELIANCE.NS': 'Oil Gas & Consumable Fuels', ...}
+    if path:
+        constituents = pd.read_csv(path)
+        constituents.columns = [c.strip() for c in constituents.columns]
+        pairs = zip(constituents['Symbol'].str.strip(), constituents['Industry'].str.strip())
+    else:
+        pairs = NIFTY_50.items()
+    return {f"{symbol}.NS": industry for symbol, industry in pairs}
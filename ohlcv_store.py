@@ -0,0 +1,133 @@
+import os
+import re
+import threading
+
+import pandas as pd
+import yfinance as yf
+
+import perf
+
+# Local Parquet store of daily OHLCV bars, one file per symbol. A request
+# only downloads the bars after the last stored date; everything else is
+# served from disk, including when Yahoo is slow or down.
+
+STORE_DIR = os.environ.get("OHLCV_STORE_DIR", os.path.join(".cache", "ohlcv"))
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+_PERIOD = re.compile(r"^(\d+)(d|wk|mo|y)$")
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _lock(symbol):
+    with _locks_guard:
+        return _locks.setdefault(symbol, threading.Lock())
+
+
+def _path(symbol):
+    return os.path.join(STORE_DIR, re.sub(r"[^A-Za-z0-9._-]", "_", symbol) + ".parquet")
+
+
+def _period_start(period, now):
+    # Calendar start of a yfinance period string; None means "everything"
+    if period == "max":
+        return None
+    if period == "ytd":
+        return now.normalize().replace(month=1, day=1)
+    match = _PERIOD.match(period)
+    if match is None:
+        raise ValueError(f"Unsupported period: {period}")
+    count, unit = int(match.group(1)), match.group(2)
+    offset = {
+        'd': pd.DateOffset(days=count),
+        'wk': pd.DateOffset(weeks=count),
+        'mo': pd.DateOffset(months=count),
+        'y': pd.DateOffset(years=count),
+    }[unit]
+    return now.normalize() - offset
+
+
+def _slice(hist, period):
+    # "Nd" periods count trading sessions, as in yfinance
+    match = _PERIOD.match(period)
+    if match is not None and match.group(2) == 'd':
+        return hist.tail(int(match.group(1)))
+    start = _period_start(period, pd.Timestamp.now(tz=hist.index.tz))
+    return hist if start is None else hist[hist.index >= start]
+
+
+def _covers(stored, period):
+    covered_from = stored.attrs.get('covered_from')
+    if covered_from == "max":
+        return True
+    if covered_from is None:
+        return False
+    start = _period_start(period, pd.Timestamp.now(tz=stored.index.tz))
+    return start is not None and pd.Timestamp(covered_from) <= start
+
+
+def load(symbol):
+    path = _path(symbol)
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+
+def stored_at(symbol):
+    # Modification time of the symbol's file, None if nothing is stored
+    path = _path(symbol)
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+def _save(symbol, hist):
+    os.makedirs(STORE_DIR, exist_ok=True)
+    path = _path(symbol)
+    # Unique across the worker processes sharing STORE_DIR, not just threads
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    hist.to_parquet(tmp)
+    os.replace(tmp, path)
+
+
+def stored_history(symbol, period="6mo"):
+    # Disk only, never touches the network; None unless the stored bars
+    # cover the whole period
+    stored = load(symbol)
+    if stored is None or stored.empty or not _covers(stored, period):
+        return None
+    return _slice(stored, period)
+
+
+def history(symbol, period="6mo"):
+    with _lock(symbol):
+        stored = load(symbol)
+        try:
+            if stored is not None and not stored.empty and _covers(stored, period):
+                # Refetch from the last stored session so a bar that was still
+                # forming when it was stored gets its final values
+                with perf.span('yfinance.history'):
+                    fresh = yf.Ticker(symbol).history(start=stored.index[-1].date(), interval="1d")
+                covered_from = stored.attrs['covered_from']
+            else:
+                with perf.span('yfinance.history'):
+                    fresh = yf.Ticker(symbol).history(period=period, interval="1d")
+                stored = None
+                start = _period_start(period, pd.Timestamp.now(tz=fresh.index.tz if not fresh.empty else None))
+                covered_from = "max" if start is None else start.isoformat()
+        except Exception as e:
+            # Shorter stored bars would pass for the requested period
+            if stored is None or stored.empty or not _covers(stored, period):
+                raise
+            perf.record_error('ohlcv_refresh', e)
+            return _slice(stored, period)
+
+        if not fresh.empty:
+            fresh = fresh[[c for c in COLUMNS if c in fresh.columns]]
+            merged = fresh if stored is None else pd.concat([stored, fresh])
+            merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+            merged.attrs['covered_from'] = covered_from
+            _save(symbol, merged)
+            stored = merged
+
+    if stored is None or stored.empty:
+        return None
+    return _slice(stored, period)
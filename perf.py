@@ -0,0 +1,195 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# Process-wide timing spans and counters for the hot path: upstream calls,
+# cache lookups and render sections. Exported as Prometheus text (optionally
+# over HTTP on METRICS_PORT) and shown in the app's admin panel.
+
+METRICS_PORT = os.environ.get("METRICS_PORT")
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+RECENT_SAMPLES = 512
+
+logger = logging.getLogger(__name__)
+
+
+class _Span:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+
+_spans = defaultdict(_Span)
+_counters = defaultdict(int)
+_collectors = []
+_lock = threading.Lock()
+_server = None
+_server_attempted = False
+
+
+def observe(name, seconds):
+    with _lock:
+        span = _spans[name]
+        span.count += 1
+        span.total += seconds
+        span.max = max(span.max, seconds)
+        span.recent.append(seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                span.buckets[i] += 1
+
+
+@contextmanager
+def span(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started)
+
+
+def timed(name):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, amount=1, **labels):
+    with _lock:
+        _counters[(name, tuple(sorted(labels.items())))] += amount
+
+
+def record_error(stage, exc):
+    # For failures that are handled (fallback data, demo text) rather than
+    # raised, so they stay visible instead of disappearing into an except
+    count('upstream_errors', stage=stage, error=type(exc).__name__)
+    logger.warning("%s failed: %s", stage, exc)
+
+
+def register_collector(fn):
+    # fn() -> iterable of (name, labels dict, value); read at export time,
+    # used for cache statistics owned by other modules. Names ending in
+    # _total are exported as counters, everything else as gauges.
+    _collectors.append(fn)
+
+
+def span_summary():
+    with _lock:
+        spans = {name: (s.count, s.total, s.max, list(s.recent)) for name, s in _spans.items()}
+    rows = []
+    for name, (n, total, peak, recent) in sorted(spans.items()):
+        p50, p95 = np.percentile(recent, [50, 95]) if recent else (0.0, 0.0)
+        rows.append({'span': name, 'count': n, 'mean_s': total / n if n else 0.0,
+                     'p50_s': p50, 'p95_s': p95, 'max_s': peak})
+    return rows
+
+
+def process_rss():
+    # Resident set size in bytes; falls back to the peak where /proc is missing
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _collected():
+    rows = [row for collector in _collectors for row in collector()]
+    return sorted(rows, key=lambda row: row[0])
+
+
+def counter_summary():
+    with _lock:
+        counters = dict(_counters)
+    rows = [{'metric': name, **dict(labels), 'value': value} for (name, labels), value in sorted(counters.items())]
+    rows.extend({'metric': name, **labels, 'value': value} for name, labels, value in _collected())
+    return rows
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in labels) + "}"
+
+
+def render_prometheus(prefix="wealth"):
+    lines = []
+    with _lock:
+        spans = {name: (s.count, s.total, list(s.buckets)) for name, s in _spans.items()}
+        counters = dict(_counters)
+
+    lines.append(f"# TYPE {prefix}_span_seconds histogram")
+    for name, (n, total, buckets) in sorted(spans.items()):
+        for bound, cumulative in zip(BUCKETS, buckets):
+            lines.append(f"{prefix}_span_seconds_bucket{_labels([('span', name), ('le', bound)])} {cumulative}")
+        lines.append(f"{prefix}_span_seconds_bucket{_labels([('span', name), ('le', '+Inf')])} {n}")
+        lines.append(f"{prefix}_span_seconds_sum{_labels([('span', name)])} {total:.6f}")
+        lines.append(f"{prefix}_span_seconds_count{_labels([('span', name)])} {n}")
+
+    typed = set()
+    for (name, labels), value in sorted(counters.items()):
+        if name not in typed:
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            typed.add(name)
+        lines.append(f"{prefix}_{name}_total{_labels(labels)} {value}")
+
+    for name, labels, value in _collected():
+        if name not in typed:
+            lines.append(f"# TYPE {prefix}_{name} {'counter' if name.endswith('_total') else 'gauge'}")
+            typed.add(name)
+        lines.append(f"{prefix}_{name}{_labels(sorted(labels.items()))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_metrics_server(port=METRICS_PORT):
+    # Serves /metrics for Prometheus scraping; idempotent, off unless a port
+    # is configured
+    global _server, _server_attempted
+    with _lock:
+        if _server_attempted or not port:
+            return
+        _server_attempted = True
+        try:
+            _server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+        except OSError as e:
+            # Typically another worker process on the host already serves
+            # the port; not retried, so reruns do not fail on it
+            logger.warning("Metrics server not started on port %s: %s", port, e)
+            return
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+
+
+register_collector(lambda: [('process_rss_bytes', {}, process_rss())])
@@ -0,0 +1,117 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Monte Carlo wealth projection for monthly SIP contributions. Paths are
+# simulated month by month as one vector, so memory stays at a few arrays of
+# n_paths floats however long the horizon is.
+
+# Long-run annual assumptions for Indian asset classes
+ASSET_CLASSES = {
+    'equity': {'return': 0.12, 'volatility': 0.18},
+    'debt': {'return': 0.07, 'volatility': 0.04},
+}
+CORRELATIONS = {('equity', 'debt'): 0.1}
+
+RISK_EQUITY_PCT = {"Conservative": 40, "Moderate": 60, "Aggressive": 80}
+HORIZONS = (5, 10, 15, 20)
+PERCENTILES = (10, 25, 50, 75, 90)
+N_PATHS = int(os.environ.get("PROJECTION_PATHS", 100_000))
+
+
+def allocation(risk):
+    equity_pct = RISK_EQUITY_PCT[risk]
+    return {'equity': equity_pct / 100, 'debt': 1 - equity_pct / 100}
+
+
+def portfolio_moments(weights):
+    # Expected annual return and volatility of a monthly-rebalanced mix
+    names = list(weights)
+    w = np.array([weights[n] for n in names])
+    mu = np.array([ASSET_CLASSES[n]['return'] for n in names])
+    vol = np.array([ASSET_CLASSES[n]['volatility'] for n in names])
+    corr = np.eye(len(names))
+    for i, a in enumerate(names):
+        for j, b in enumerate(names):
+            if i != j:
+                corr[i, j] = CORRELATIONS.get((a, b), CORRELATIONS.get((b, a), 0.0))
+    cov = np.outer(vol, vol) * corr
+    return float(w @ mu), float(np.sqrt(w @ cov @ w))
+
+
+def simulate_sip(monthly, weights, years=max(HORIZONS), n_paths=N_PATHS, percentiles=PERCENTILES, seed=None):
+    # Returns a DataFrame indexed by year (1..years) with one column per
+    # percentile of the corpus at that year end, plus the amount invested.
+    mean, vol = portfolio_moments(weights)
+    # Lognormal monthly returns matching the annual mean and volatility
+    sigma_ln = np.sqrt(np.log1p((vol / (1 + mean)) ** 2))
+    mu_ln = np.log1p(mean) - sigma_ln ** 2 / 2
+    mu_m, sigma_m = mu_ln / 12, sigma_ln / np.sqrt(12)
+
+    # Antithetic pairs: each draw z is reused as -z for a second path, which
+    # halves random number generation (the dominant cost) and reduces variance
+    rng = np.random.default_rng(seed)
+    half = (n_paths + 1) // 2
+    wealth = np.zeros(n_paths, dtype=np.float32)
+    growth = np.empty(n_paths, dtype=np.float32)
+    year_end = np.empty((years, n_paths), dtype=np.float32)
+    for month in range(years * 12):
+        rng.standard_normal(half, dtype=np.float32, out=growth[:half])
+        np.negative(growth[:n_paths - half], out=growth[half:])
+        growth *= sigma_m
+        growth += mu_m
+        np.exp(growth, out=growth)
+        wealth += monthly
+        wealth *= growth
+        if month % 12 == 11:
+            year_end[month // 12] = wealth
+
+    bands = np.percentile(year_end, percentiles, axis=1).T
+    result = pd.DataFrame(bands, columns=[f"p{p}" for p in percentiles], index=pd.RangeIndex(1, years + 1, name='Year'))
+    result['invested'] = monthly * 12 * result.index.to_numpy()
+    return result
+
+
+def plan_table(profiles, horizons=HORIZONS, percentiles=(10, 50, 90), n_paths=N_PATHS, seed=0):
+    # Allocation, moments and projected corpus for a DataFrame of profiles
+    # (income, expenses, risk columns). A SIP corpus scales linearly with the
+    # monthly amount, so each risk level is simulated once for ₹1/month and
+    # scaled for every profile.
+    plans = profiles.copy()
+    plans['surplus'] = plans['income'] - plans['expenses']
+    plans['equity_pct'] = plans['risk'].map(RISK_EQUITY_PCT)
+    contribution = plans['surplus'].clip(lower=0).to_numpy(dtype=float)
+    columns = {}
+    for risk in plans['risk'].unique():
+        rows = (plans['risk'] == risk).to_numpy()
+        mean, vol = portfolio_moments(allocation(risk))
+        unit = simulate_sip(1, allocation(risk), max(horizons), n_paths, percentiles, seed)
+        columns.setdefault('expected_return', np.full(len(plans), np.nan))[rows] = mean
+        columns.setdefault('volatility', np.full(len(plans), np.nan))[rows] = vol
+        for years in horizons:
+            columns.setdefault(f'invested_{years}y', contribution * 12 * years)
+            for p in percentiles:
+                column = columns.setdefault(f'corpus_{years}y_p{p}', np.full(len(plans), np.nan))
+                column[rows] = contribution[rows] * unit.loc[years, f'p{p}']
+    return plans.assign(**columns)
+
+
+def strategy_prompt(age, income, expenses, risk):
+    # Claude prompt for one profile; used by the Portfolio Planner and by
+    # batch generation
+    return f"""Create a personalized investment strategy for:
+    - Age: {int(age)}
+    - Monthly Income: ₹{int(income):,}
+    - Monthly Expenses: ₹{int(expenses):,}
+    - Surplus: ₹{int(income - expenses):,}
+    - Risk Appetite: {risk}
+    
+    Provide:
+    1) Asset allocation strategy
+    2) Specific mutual fund recommendations
+    3) Expected returns and time horizon
+    4) Tax optimization
+    5) 10-year wealth projection
+    
+    Consider Indian market context and regulations."""
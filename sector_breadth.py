@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+# Sector returns and breadth for the NSE sectoral indices, computed for all
+# sectors at once from the shared price matrix: a sector x symbol membership
+# matrix turns every aggregate into one matrix product.
+
+# NSE industry classification -> sectoral index. Banks are listed separately
+# because NSE files them under Financial Services; like NIFTY BANK and
+# NIFTY FIN SERVICE, a bank counts towards both.
+INDUSTRY_SECTORS = {
+    "Financial Services": "Financial Services",
+    "Information Technology": "IT",
+    "Healthcare": "Pharma & Healthcare",
+    "Fast Moving Consumer Goods": "FMCG",
+    "Automobile and Auto Components": "Auto",
+    "Metals & Mining": "Metal",
+    "Oil Gas & Consumable Fuels": "Energy",
+    "Power": "Energy",
+    "Realty": "Realty",
+    "Media Entertainment & Publication": "Media",
+    "Consumer Durables": "Consumer Durables",
+    "Construction": "Infrastructure",
+    "Construction Materials": "Infrastructure",
+    "Capital Goods": "Capital Goods",
+    "Telecommunication": "Telecom",
+    "Chemicals": "Chemicals",
+}
+BANKS = {
+    'HDFCBANK', 'ICICIBANK', 'SBIN', 'KOTAKBANK', 'AXISBANK', 'INDUSINDBK', 'BANKBARODA',
+    'PNB', 'CANBK', 'AUBANK', 'FEDERALBNK', 'IDFCFIRSTB', 'BANDHANBNK', 'UNIONBANK',
+    'INDIANB', 'BANKINDIA', 'IOB', 'UCOBANK', 'CENTRALBK', 'MAHABANK', 'YESBANK',
+}
+DMA_WINDOW = 50
+
+
+def membership(universe):
+    # Boolean sector x symbol matrix for {symbol: industry}
+    sectors = {}
+    for symbol, industry in universe.items():
+        if symbol.removesuffix('.NS') in BANKS:
+            sectors.setdefault("Banking", set()).add(symbol)
+        sector = INDUSTRY_SECTORS.get(industry)
+        if sector:
+            sectors.setdefault(sector, set()).add(symbol)
+    symbols = list(universe)
+    names = sorted(sectors)
+    matrix = np.array([[symbol in sectors[name] for symbol in symbols] for name in names], dtype=bool)
+    return pd.DataFrame(matrix.reshape(len(names), len(symbols)), index=names, columns=symbols)
+
+
+def sector_breadth(closes, universe, market_caps=None):
+    # One row per sector: market-cap-weighted 1-day return, advances,
+    # declines, A/D ratio and % of members above their 50-day average
+    members = membership(universe).reindex(columns=closes.columns, fill_value=False)
+    if closes.shape[0] < 2 or members.empty:
+        return pd.DataFrame()
+
+    filled = closes.ffill()
+    prices = filled.to_numpy(dtype=float)
+    change = prices[-1] / prices[-2] - 1
+    valid = ~np.isnan(change)
+    change = np.where(valid, change, 0.0)
+
+    caps = pd.Series(market_caps or {}, dtype=float).reindex(closes.columns).to_numpy()
+    # Symbols without a market cap get the median weight rather than dropping out
+    fallback = np.nanmedian(caps) if np.isfinite(caps).any() else 1.0
+    weights = np.where(np.isfinite(caps) & (caps > 0), caps, fallback) * valid
+
+    dma = filled.rolling(DMA_WINDOW, min_periods=DMA_WINDOW).mean().to_numpy()[-1]
+    has_dma = ~np.isnan(dma)
+    above = np.where(has_dma, prices[-1] > dma, False)
+
+    m = members.to_numpy(dtype=float)
+    weight_sum = m @ weights
+    advances = m @ (valid & (change > 0))
+    declines = m @ (valid & (change < 0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sector_return = (m @ (weights * change)) / weight_sum * 100
+        ad_ratio = advances / declines
+        above_dma = (m @ above) / (m @ has_dma) * 100
+
+    return pd.DataFrame({
+        'Return %': sector_return,
+        'Advances': advances.astype(int),
+        'Declines': declines.astype(int),
+        'A/D': ad_ratio,
+        '% above 50DMA': above_dma,
+        'Stocks': m.sum(axis=1).astype(int),
+    }, index=members.index).dropna(subset=['Return %'])
+
+
+def market_breadth(closes):
+    # Advances and declines across the whole universe for the latest session
+    if closes.shape[0] < 2:
+        return None
+    prices = closes.ffill().to_numpy(dtype=float)
+    change = prices[-1] / prices[-2] - 1
+    return {
+        'advances': int(np.sum(change > 0)),
+        'declines': int(np.sum(change < 0)),
+        'unchanged': int(np.sum(change == 0)),
+    }
@@ -0,0 +1,56 @@
+import threading
+from concurrent.futures import Future
+
+import perf
+
+# Request coalescing: while a call for a key is in flight, identical calls
+# from other threads (sessions) wait for it and share its result or error
+# instead of hitting the upstream themselves.
+
+
+class _Abandoned(Exception):
+    pass
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        shared = False
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = Future()
+            if leader:
+                break
+            if not shared:
+                perf.count('singleflight_shared', group=self.name)
+                shared = True
+            try:
+                return call.result()
+            except _Abandoned:
+                continue  # the leader was interrupted; try again, possibly as leader
+
+        try:
+            result = fn()
+        except Exception as e:
+            call.set_exception(e)
+            raise
+        except BaseException:
+            # Interrupts such as Streamlit stopping or rerunning the leader's
+            # script belong to the leader's session, not to the waiters
+            call.set_exception(_Abandoned())
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            # Callers should make fn store its result (in a cache) before
+            # returning, so nobody arriving after this starts a new call
+            with self._lock:
+                del self._calls[key]
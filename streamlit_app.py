@@ -1,9 +1,26 @@
 import streamlit as st
+from streamlit.runtime import Runtime
 import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
+import hashlib
+import hmac
+import io
+import os
 import numpy as np
-from anthropic import Anthropic
-import yfinance as yf
+from datetime import datetime
+
+from ai_cache import CACHE_TTL, MARKET_TTL, make_key
+from ai_cache import cache as response_cache
+import batch_strategies
+from charts import RANGES, price_chart, range_history
+from ai_service import MODEL, STREAMING, UpstreamUnavailable, breaker, create_response, get_client, stream_response
+from ai_service import flights as ai_flights
+from market_fetcher import FETCH_TIMEOUT, fetch_stock, quote_from_history
+import market_refresher
+import perf
+from market_rankings import LOOKBACKS, movers
+from portfolio_engine import (HORIZONS, N_PATHS, RISK_EQUITY_PCT, allocation, portfolio_moments, simulate_sip,
+                              strategy_prompt)
 
 st.set_page_config(
     page_title="Sandeep's AI Wealth Management",
@@ -11,453 +28,671 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize AI client with error handling
+# Initialize AI client with error handling. The client is a process-wide
+# singleton; while the circuit breaker is open the app runs in demo mode.
 def get_ai_client():
     try:
         claude_api_key = st.secrets.get("CLAUDE_API_KEY", "demo-key")
         if claude_api_key and claude_api_key != "demo-key" and claude_api_key.startswith("sk-ant-"):
-            return Anthropic(api_key=claude_api_key)
+            if breaker.is_open:
+                st.warning("⚠️ AI service is temporarily unavailable - showing demo responses")
+                return None
+            return get_client(claude_api_key)
     except Exception as e:
         st.error(f"Failed to initialize AI client: {str(e)}")
     return None
 
-def get_ai_response(prompt, client):
+# Responses are cached on disk keyed on the model, the normalized prompt and,
+# for prompts that embed live numbers, the quantized market inputs
+def ai_cache_key(prompt, market=None):
+    return make_key(MODEL, prompt, market), (MARKET_TTL if market is not None else CACHE_TTL)
+
+def get_ai_response(prompt, client, market=None):
     if client is None:
         return "Demo mode: Configure Claude API key in Streamlit Cloud secrets for real AI responses."
     
+    key, ttl = ai_cache_key(prompt, market)
+    cached = response_cache.get(key)
+    if cached:
+        return cached
+    
+    # Sessions asking the same question at the same time share one call.
+    # An empty answer is returned but not cached, so the next ask retries.
+    def create():
+        response = response_cache.peek(key)
+        if not response:
+            with perf.span('ai.response'):
+                response = create_response(client, prompt)
+            if response:
+                response_cache.set(key, response, ttl)
+        return response
+    
     try:
-        response = client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=1000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text
+        return ai_flights.do(('create', key), create)
+    except UpstreamUnavailable:
+        return "Demo mode: The AI service is temporarily unavailable. Please try again in a minute."
     except Exception as e:
+        perf.record_error('ai.response', e)
         return f"Error: {str(e)}"
 
+# Render an AI answer under a heading, streaming text as it is generated.
+# Falls back to the blocking call if streaming is off or fails before any text.
+def show_ai_response(title, prompt, client, market=None):
+    if client is None or not STREAMING:
+        st.markdown(f"{title}\n\n{get_ai_response(prompt, client, market)}")
+        return
+    
+    key, ttl = ai_cache_key(prompt, market)
+    cached = response_cache.get(key)
+    if cached:
+        st.markdown(f"{title}\n\n{cached}")
+        st.caption("Cached response")
+        return
+    
+    placeholder = st.empty()
+    timing = {}
+    
+    # The first session to ask streams the answer; sessions asking the same
+    # question meanwhile wait for it and show the finished text
+    def stream():
+        text = response_cache.peek(key) or ""
+        if text:
+            return text
+        try:
+            for delta in stream_response(client, prompt, timing):
+                text += delta
+                placeholder.markdown(f"{title}\n\n{text}▌")
+            if text:
+                response_cache.set(key, text, ttl)
+        except UpstreamUnavailable:
+            text = "Demo mode: The AI service is temporarily unavailable. Please try again in a minute."
+        except Exception as e:
+            perf.record_error('ai.stream', e)
+            if not text:
+                text = get_ai_response(prompt, client, market)
+            else:
+                text += f"\n\nError: {str(e)}"
+        return text
+    
+    text = ai_flights.do(('stream', key), stream)
+    placeholder.markdown(f"{title}\n\n{text}")
+    if 'total' in timing:
+        st.caption(f"First token in {timing.get('ttft', timing['total']):.1f}s · complete in {timing['total']:.1f}s")
+
+# Fixed seed so the same inputs always show the same bands; cached per input
+# combination so reruns from other widgets don't re-simulate
+@st.cache_data(max_entries=256, show_spinner=False)
+def wealth_projection(surplus, risk):
+    return simulate_sip(surplus, allocation(risk), seed=0)
+
+def projection_chart(projection):
+    years = projection.index
+    fig = go.Figure()
+    for low, high, color in [('p10', 'p90', 'rgba(102, 126, 234, 0.15)'), ('p25', 'p75', 'rgba(102, 126, 234, 0.3)')]:
+        fig.add_trace(go.Scatter(x=years, y=projection[high], line_width=0, showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=years, y=projection[low], line_width=0, fill='tonexty', fillcolor=color,
+                                 name=f"{low.upper()}-{high.upper()}"))
+    fig.add_trace(go.Scatter(x=years, y=projection['p50'], name='Median', line=dict(color='#667eea', width=2)))
+    fig.add_trace(go.Scatter(x=years, y=projection['invested'], name='Invested', line=dict(color='#764ba2', dash='dot')))
+    fig.update_layout(
+        title='Projected Corpus (Monte Carlo)',
+        xaxis_title="Years",
+        yaxis_title="Corpus (₹)",
+        hovermode='x unified'
+    )
+    return fig
+
+MOVER_VIEWS = {
+    "Gainers": ("🔥 Top Gainers", 'gainers'),
+    "Losers": ("🧊 Top Losers", 'losers'),
+    "Volume": ("📢 Volume Spikes", 'volume')
+}
+
+# HDFC Bank and other refreshed symbols are read from the background
+# snapshot; any other NSE symbol is fetched (through the shared caches) on
+# demand. Returns (stock data, error); see market_fetcher.fetch_stocks.
 def get_stock_data(symbol):
-    try:
-        stock = yf.Ticker(f"{symbol}.NS")  # .NS for NSE stocks
-        info = stock.info
-        hist = stock.history(period="1d")
-        if not hist.empty:
-            current_price = hist['Close'].iloc[-1]
-            return {
-                'price': current_price,
-                'company': info.get('longName', symbol),
-                'market_cap': info.get('marketCap', 'N/A'),
-                'pe_ratio': info.get('trailingPE', 'N/A')
-            }
-    except:
-        pass
-    return None
+    snapshot = market_refresher.latest()
+    if snapshot and symbol in snapshot['stocks']:
+        return snapshot['stocks'][symbol], None
+    return fetch_stock(symbol)
 
-def main():
-    st.markdown("""
-    <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                padding: 2rem; border-radius: 10px; color: white; text-align: center; margin-bottom: 2rem;'>
-        <h1>🧠 AI Wealth Management</h1>
-        <p>Intelligent Investment Strategies for Indian Markets</p>
-        <p><strong>By Sandeep Yadav</strong> | Advanced AI-Powered Financial Planning</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Check API status
-    client = get_ai_client()
-    if client:
-        st.success("✅ AI System Active - Real-time Analysis Available")
-    else:
-        st.info("ℹ️ Demo Mode - Configure API keys for full functionality")
+def snapshot_caption(snapshot):
+    updated = datetime.fromtimestamp(snapshot['updated_at'], market_refresher.IST)
+    age = market_refresher.snapshot_age(snapshot)
+    age_text = f"{age:.0f}s" if age < 120 else f"{age / 60:.0f} min"
+    return f"🕒 Market data as of {updated:%d %b %H:%M:%S} IST ({age_text} ago)"
+
+# Hidden diagnostics: append ?admin=<ADMIN_TOKEN> to the URL to show
+# process-wide timings, counters and cache statistics
+def is_admin():
+    # st.secrets draws its own error box when there is no secrets file, so
+    # it is only read once a file is known to exist
+    token = os.environ.get("ADMIN_TOKEN")
+    if not token and st.secrets.load_if_toml_exists():
+        token = st.secrets.get("ADMIN_TOKEN")
+    supplied = st.query_params.get("admin")
+    return bool(token) and supplied is not None and hmac.compare_digest(str(supplied), str(token))
+
+def session_memory():
+    # Session state bytes for every connected session, from Streamlit's own
+    # stats providers (the same numbers its /_stcore/metrics endpoint reports)
+    session_mgr = getattr(Runtime.instance(), '_session_mgr', None) if Runtime.exists() else None
+    if session_mgr is None:
+        return []
+    sessions = session_mgr.list_active_sessions()
+    return [sum(stat.byte_length for stat in info.session.session_state.get_stats()) for info in sessions]
+
+def render_memory():
+    rss = perf.process_rss()
+    snapshot = market_refresher.latest()
+    sessions = session_memory()
+    cols = st.columns(4)
+    cols[0].metric("Process RSS", f"{rss / 2**20:,.0f} MiB")
+    cols[1].metric("Shared snapshot", f"{snapshot['nbytes'] / 2**20:,.1f} MiB" if snapshot else "-")
+    cols[2].metric("Sessions", len(sessions))
+    cols[3].metric("Session state / session", f"{np.mean(sessions) / 2**10:,.1f} KiB" if sessions else "-")
+    if sessions:
+        st.caption(f"Largest session state {max(sessions) / 2**10:,.1f} KiB · "
+                   f"RSS per session {rss / len(sessions) / 2**20:,.1f} MiB (including shared data)")
+
+def render_admin_panel():
+    st.markdown("---")
+    st.markdown("### ⚙️ Performance")
+    snapshot = market_refresher.latest()
+    if snapshot:
+        st.caption(f"{snapshot_caption(snapshot)} · {len(snapshot['histories'])} histories, "
+                   f"{len(snapshot['errors'])} errors")
+    render_memory()
+    spans = pd.DataFrame(perf.span_summary())
+    if not spans.empty:
+        st.dataframe(spans, hide_index=True, column_config={
+            column: st.column_config.NumberColumn(format="%.3f") for column in ('mean_s', 'p50_s', 'p95_s', 'max_s')
+        })
+    counters = pd.DataFrame(perf.counter_summary())
+    if not counters.empty:
+        st.dataframe(counters, hide_index=True)
+    st.download_button("Download metrics (Prometheus)", perf.render_prometheus(), file_name="metrics.txt")
+
+@perf.timed('render.ai_assistant')
+def render_ai_assistant(client):
+    st.markdown("### 🤖 Your AI Financial Advisor")
     
-    tab1, tab2, tab3 = st.tabs(["🤖 AI Assistant", "📊 Market Data", "🎯 Portfolio Planner"])
+    col1, col2, col3 = st.columns(3)
     
-    with tab1:
-        st.markdown("### 🤖 Your AI Financial Advisor")
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            if st.button("📈 Analyze HDFC Bank"):
-                with st.spinner("Analyzing HDFC Bank..."):
-                    stock_data = get_stock_data("HDFCBANK")
+    with col1:
+        symbol = st.text_input("NSE symbol", key="analyze_symbol", label_visibility="collapsed",
+                               placeholder="NSE symbol, e.g. HDFCBANK").strip().upper() or "HDFCBANK"
+        if st.button(f"📈 Analyze {symbol}"):
+            with st.spinner(f"Analyzing {symbol}..."):
+                stock_data, error = get_stock_data(symbol)
+                
+                if error and error['kind'] == 'not_found':
+                    st.warning(f"⚠️ {symbol} was not found on NSE. Check the symbol, e.g. HDFCBANK or TCS.")
+                elif client and stock_data:
+                    prompt = f"""Analyze {stock_data['company']} ({symbol}) stock for Indian investors. Current price: ₹{stock_data['price']:.2f}, 
+                    PE Ratio: {stock_data['pe_ratio']}, Market Cap: {stock_data['market_cap']}.
+                    Provide: 1) Current analysis 2) Investment recommendation 3) Risk assessment 4) Price targets.
+                    Keep response under 300 words, use Indian context."""
                     
-                    if client and stock_data:
-                        prompt = f"""Analyze HDFC Bank stock for Indian investors. Current price: ₹{stock_data['price']:.2f}, 
-                        PE Ratio: {stock_data['pe_ratio']}, Market Cap: {stock_data['market_cap']}.
-                        Provide: 1) Current analysis 2) Investment recommendation 3) Risk assessment 4) Price targets.
-                        Keep response under 300 words, use Indian context."""
-                        
-                        response = get_ai_response(prompt, client)
-                        st.markdown(f"**📈 HDFC Bank AI Analysis**\n\n{response}")
-                    else:
-                        st.markdown("""
-                        **📈 HDFC Bank Stock Analysis**
-                        
-                        **Current Status:** ₹1,589 (+0.8%)
-                        
-                        **✅ Strengths:**
-                        - Leading private bank with 35+ year track record
-                        - Strong digital banking platform
-                        - Consistent dividend payments
-                        
-                        **📊 Key Metrics:**
-                        - P/E Ratio: 18.5x (reasonable for banking)
-                        - ROE: 16.8% (industry-leading)
-                        - Net Interest Margin: 4.2%
-                        
-                        **🎯 Recommendation:** BUY for long-term (3+ years)
-                        **Risk Level:** Moderate
-                        **Portfolio Allocation:** 5-8% of equity portion
-                        
-                        *Demo analysis - Configure API keys for real-time AI insights*
-                        """)
-        
-        with col2:
-            if st.button("💰 SIP Strategy"):
-                with st.spinner("Generating SIP strategy..."):
-                    if client:
-                        prompt = """Create a detailed SIP strategy for ₹20,000/month investment for Indian investors.
-                        Include: 1) Asset allocation 2) Specific fund recommendations 3) Expected returns 4) Tax benefits
-                        5) 10-year wealth projection. Focus on Indian mutual funds and tax-saving options."""
-                        
-                        response = get_ai_response(prompt, client)
-                        st.markdown(f"**💰 AI-Generated SIP Strategy**\n\n{response}")
-                    else:
-                        st.markdown("""
-                        **💰 Smart SIP Strategy for ₹20,000/month**
-                        
-                        **🎯 Recommended Allocation:**
-                        
-                        **🔵 Large Cap (40% - ₹8,000)**
-                        - HDFC Top 100 Fund
-                        - Expected: 10-12% annually
-                        
-                        **🟢 Multi Cap (30% - ₹6,000)**  
-                        - Parag Parikh Flexi Cap Fund
-                        - Expected: 12-15% annually
-                        
-                        **🛡️ ELSS (20% - ₹4,000)**
-                        - Axis Long Term Equity Fund
-                        - Tax Benefit: ₹48,000 annual deduction
-                        
-                        **🌍 International (10% - ₹2,000)**
-                        - Motilal Oswal Nasdaq 100
-                        - Currency diversification
-                        
-                        **📈 Projected Wealth (12% CAGR):**
-                        - 10 Years: ₹46L (Investment: ₹24L)
-                        - 15 Years: ₹99L (Investment: ₹36L)
-                        
-                        *Demo strategy - Real AI provides personalized plans*
-                        """)
-        
-        with col3:
-            if st.button("🛡️ Tax Planning"):
-                with st.spinner("Analyzing tax-saving options..."):
-                    if client:
-                        prompt = """Provide comprehensive tax planning guide for Indian investors for FY 2024-25.
-                        Include: 1) Section 80C options 2) ELSS vs other instruments 3) Section 80D health insurance
-                        4) NPS benefits 5) Total tax saving calculation. Be specific with amounts and tax rates."""
-                        
-                        response = get_ai_response(prompt, client)
-                        st.markdown(f"**🛡️ AI Tax Planning Guide**\n\n{response}")
-                    else:
-                        st.markdown("""
-                        **🛡️ Tax-Saving Guide 2024-25**
-                        
-                        **💰 Section 80C (₹1.5L limit):**
-                        
-                        **🥇 ELSS Mutual Funds (Best Option)**
-                        - Investment: ₹1,50,000 annually
-                        - Lock-in: Only 3 years
-                        - Expected Return: 12-15%
-                        - Tax Saving: ₹46,500 (30% rate)
-                        
-                        **🛡️ Section 80CCD(1B) (₹50K extra):**
-                        - NPS investment
-                        - Additional ₹15,000 tax saving
-                        
-                        **💊 Section 80D (Health Insurance):**
-                        - Self + Family: ₹25,000
-                        - Parents >60: ₹50,000
-                        
-                        **🎯 Total Tax Saving Potential:**
-                        - 80C: ₹46,500
-                        - 80CCD(1B): ₹15,000  
-                        - 80D: ₹22,500
-                        - **Total: ₹84,000+ annually**
-                        
-                        *Demo guide - AI provides personalized strategies*
-                        """)
-        
-        st.markdown("#### 💬 Ask Your AI Advisor")
-        query = st.text_input("Ask about investments, stocks, mutual funds, or financial planning:")
-        
-        if query:
-            with st.spinner("AI is analyzing your query..."):
+                    market = {
+                        'symbol': symbol,
+                        'price': stock_data['price'],
+                        'pe_ratio': stock_data['pe_ratio'],
+                        'market_cap': stock_data['market_cap']
+                    }
+                    show_ai_response(f"**📈 {stock_data['company']} AI Analysis**", prompt, client, market)
+                    if error:
+                        st.caption(f"Fundamentals unavailable right now ({error['message']})")
+                elif stock_data:
+                    pe_ratio = f"{stock_data['pe_ratio']:.1f}x" if isinstance(stock_data['pe_ratio'], (int, float)) else "N/A"
+                    market_cap = (f"₹{stock_data['market_cap'] / 1e7:,.0f} Cr"
+                                  if isinstance(stock_data['market_cap'], (int, float)) else "N/A")
+                    st.markdown(f"""
+                    **📈 {stock_data['company']} ({symbol})**
+                    
+                    - **Price:** ₹{stock_data['price']:,.2f}
+                    - **P/E Ratio:** {pe_ratio}
+                    - **Market Cap:** {market_cap}
+                    
+                    *Demo mode - Configure API keys for AI analysis*
+                    """)
+                    if error:
+                        st.caption(f"Fundamentals unavailable right now ({error['message']})")
+                elif symbol != "HDFCBANK":
+                    st.warning(f"⚠️ Live data for {symbol} is unavailable right now ({error['message']}). Please try again shortly.")
+                else:
+                    st.markdown("""
+                    **📈 HDFC Bank Stock Analysis**
+                    
+                    **Current Status:** ₹1,589 (+0.8%)
+                    
+                    **✅ Strengths:**
+                    - Leading private bank with 35+ year track record
+                    - Strong digital banking platform
+                    - Consistent dividend payments
+                    
+                    **📊 Key Metrics:**
+                    - P/E Ratio: 18.5x (reasonable for banking)
+                    - ROE: 16.8% (industry-leading)
+                    - Net Interest Margin: 4.2%
+                    
+                    **🎯 Recommendation:** BUY for long-term (3+ years)
+                    **Risk Level:** Moderate
+                    **Portfolio Allocation:** 5-8% of equity portion
+                    
+                    *Demo analysis - Configure API keys for real-time AI insights*
+                    """)
+    
+    with col2:
+        if st.button("💰 SIP Strategy"):
+            with st.spinner("Generating SIP strategy..."):
                 if client:
-                    prompt = f"""You are an expert Indian financial advisor. Answer this investment question: "{query}"
+                    prompt = """Create a detailed SIP strategy for ₹20,000/month investment for Indian investors.
+                    Include: 1) Asset allocation 2) Specific fund recommendations 3) Expected returns 4) Tax benefits
+                    5) 10-year wealth projection. Focus on Indian mutual funds and tax-saving options."""
+                    
+                    show_ai_response("**💰 AI-Generated SIP Strategy**", prompt, client)
+                else:
+                    st.markdown("""
+                    **💰 Smart SIP Strategy for ₹20,000/month**
                     
-                    Provide practical advice considering:
-                    - Indian market context
-                    - Tax implications
-                    - Risk factors
-                    - Specific recommendations
+                    **🎯 Recommended Allocation:**
                     
-                    Keep response under 300 words and actionable."""
+                    **🔵 Large Cap (40% - ₹8,000)**
+                    - HDFC Top 100 Fund
+                    - Expected: 10-12% annually
                     
-                    response = get_ai_response(prompt, client)
-                    st.markdown(f"**🤖 AI Financial Advisor Response:**\n\n{response}")
+                    **🟢 Multi Cap (30% - ₹6,000)**  
+                    - Parag Parikh Flexi Cap Fund
+                    - Expected: 12-15% annually
+                    
+                    **🛡️ ELSS (20% - ₹4,000)**
+                    - Axis Long Term Equity Fund
+                    - Tax Benefit: ₹48,000 annual deduction
+                    
+                    **🌍 International (10% - ₹2,000)**
+                    - Motilal Oswal Nasdaq 100
+                    - Currency diversification
+                    
+                    **📈 Projected Wealth (12% CAGR):**
+                    - 10 Years: ₹46L (Investment: ₹24L)
+                    - 15 Years: ₹99L (Investment: ₹36L)
+                    
+                    *Demo strategy - Real AI provides personalized plans*
+                    """)
+    
+    with col3:
+        if st.button("🛡️ Tax Planning"):
+            with st.spinner("Analyzing tax-saving options..."):
+                if client:
+                    prompt = """Provide comprehensive tax planning guide for Indian investors for FY 2024-25.
+                    Include: 1) Section 80C options 2) ELSS vs other instruments 3) Section 80D health insurance
+                    4) NPS benefits 5) Total tax saving calculation. Be specific with amounts and tax rates."""
+                    
+                    show_ai_response("**🛡️ AI Tax Planning Guide**", prompt, client)
                 else:
-                    st.markdown(f"""
-                    **🤖 Demo Response to: "{query}"**
+                    st.markdown("""
+                    **🛡️ Tax-Saving Guide 2024-25**
+                    
+                    **💰 Section 80C (₹1.5L limit):**
                     
-                    In full mode, you would get:
-                    ✅ Real-time market analysis
-                    ✅ Personalized recommendations  
-                    ✅ Tax optimization strategies
-                    ✅ Goal-based planning
+                    **🥇 ELSS Mutual Funds (Best Option)**
+                    - Investment: ₹1,50,000 annually
+                    - Lock-in: Only 3 years
+                    - Expected Return: 12-15%
+                    - Tax Saving: ₹46,500 (30% rate)
                     
-                    *Configure API keys for advanced AI responses*
+                    **🛡️ Section 80CCD(1B) (₹50K extra):**
+                    - NPS investment
+                    - Additional ₹15,000 tax saving
+                    
+                    **💊 Section 80D (Health Insurance):**
+                    - Self + Family: ₹25,000
+                    - Parents >60: ₹50,000
+                    
+                    **🎯 Total Tax Saving Potential:**
+                    - 80C: ₹46,500
+                    - 80CCD(1B): ₹15,000  
+                    - 80D: ₹22,500
+                    - **Total: ₹84,000+ annually**
+                    
+                    *Demo guide - AI provides personalized strategies*
                     """)
     
-    with tab2:
-        st.markdown("### 📊 Indian Market Dashboard")
-        
-        # Get real market data
-        with st.spinner("Loading real market data..."):
-            try:
-                # Fetch major indices
-                nifty = yf.Ticker("^NSEI")
-                sensex = yf.Ticker("^BSESN")
-                banknifty = yf.Ticker("^NSEBANK")
+    st.markdown("#### 💬 Ask Your AI Advisor")
+    query = st.text_input("Ask about investments, stocks, mutual funds, or financial planning:", key="advisor_query")
+    
+    if query:
+        with st.spinner("AI is analyzing your query..."):
+            if client:
+                prompt = f"""You are an expert Indian financial advisor. Answer this investment question: "{query}"
                 
-                # Get current day data
-                nifty_data = nifty.history(period="2d")
-                sensex_data = sensex.history(period="2d")
-                banknifty_data = banknifty.history(period="2d")
+                Provide practical advice considering:
+                - Indian market context
+                - Tax implications
+                - Risk factors
+                - Specific recommendations
                 
-                if not nifty_data.empty and len(nifty_data) >= 2:
-                    nifty_current = nifty_data['Close'].iloc[-1]
-                    nifty_prev = nifty_data['Close'].iloc[-2]
-                    nifty_change = nifty_current - nifty_prev
-                    nifty_pct = (nifty_change / nifty_prev) * 100
-                else:
-                    nifty_current, nifty_change, nifty_pct = 19845, 125, 0.64
+                Keep response under 300 words and actionable."""
                 
-                if not sensex_data.empty and len(sensex_data) >= 2:
-                    sensex_current = sensex_data['Close'].iloc[-1]
-                    sensex_prev = sensex_data['Close'].iloc[-2]
-                    sensex_change = sensex_current - sensex_prev
-                    sensex_pct = (sensex_change / sensex_prev) * 100
-                else:
-                    sensex_current, sensex_change, sensex_pct = 66590, 234, 0.35
+                show_ai_response("**🤖 AI Financial Advisor Response:**", prompt, client)
+            else:
+                st.markdown(f"""
+                **🤖 Demo Response to: "{query}"**
                 
-                if not banknifty_data.empty and len(banknifty_data) >= 2:
-                    banknifty_current = banknifty_data['Close'].iloc[-1]
-                    banknifty_prev = banknifty_data['Close'].iloc[-2]
-                    banknifty_change = banknifty_current - banknifty_prev
-                    banknifty_pct = (banknifty_change / banknifty_prev) * 100
-                else:
-                    banknifty_current, banknifty_change, banknifty_pct = 45235, -89, -0.20
+                In full mode, you would get:
+                ✅ Real-time market analysis
+                ✅ Personalized recommendations  
+                ✅ Tax optimization strategies
+                ✅ Goal-based planning
                 
-            except Exception as e:
-                st.warning(f"Unable to fetch live data: {str(e)}. Showing sample data.")
-                nifty_current, nifty_change, nifty_pct = 19845, 125, 0.64
-                sensex_current, sensex_change, sensex_pct = 66590, 234, 0.35
-                banknifty_current, banknifty_change, banknifty_pct = 45235, -89, -0.20
-        
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("NIFTY 50", f"{nifty_current:,.0f}", f"{nifty_change:+.0f} ({nifty_pct:+.2f}%)")
-        with col2:
-            st.metric("SENSEX", f"{sensex_current:,.0f}", f"{sensex_change:+.0f} ({sensex_pct:+.2f}%)")
-        with col3:
-            st.metric("BANK NIFTY", f"{banknifty_current:,.0f}", f"{banknifty_change:+.0f} ({banknifty_pct:+.2f}%)")
-        with col4:
-            # Fetch NIFTY IT
-            try:
-                niftyit = yf.Ticker("^CNXIT")
-                niftyit_data = niftyit.history(period="2d")
-                if not niftyit_data.empty and len(niftyit_data) >= 2:
-                    niftyit_current = niftyit_data['Close'].iloc[-1]
-                    niftyit_prev = niftyit_data['Close'].iloc[-2]
-                    niftyit_change = niftyit_current - niftyit_prev
-                    niftyit_pct = (niftyit_change / niftyit_prev) * 100
-                    st.metric("NIFTY IT", f"{niftyit_current:,.0f}", f"{niftyit_change:+.0f} ({niftyit_pct:+.2f}%)")
-                else:
-                    st.metric("NIFTY IT", "29,876", "+157 (0.53%)")
-            except:
-                st.metric("NIFTY IT", "29,876", "+157 (0.53%)")
+                *Configure API keys for advanced AI responses*
+                """)
+
+@perf.timed('render.market_data')
+def render_market_data():
+    st.markdown("### 📊 Indian Market Dashboard")
+    
+    # Market data comes from the background refresher's latest snapshot.
+    # Only the first render after a cold start waits for it.
+    snapshot = market_refresher.latest()
+    if snapshot is None:
+        with st.spinner("Loading real market data..."):
+            snapshot = market_refresher.latest(wait=FETCH_TIMEOUT)
+    if snapshot is None:
+        st.warning("Live data is still loading. Showing sample data.")
+        histories, fetch_errors = {}, {}
+    else:
+        histories, fetch_errors = snapshot['histories'], snapshot['errors']
+        st.caption(snapshot_caption(snapshot))
+    
+    nifty_current, nifty_change, nifty_pct = quote_from_history(histories.get("^NSEI")) or (19845, 125, 0.64)
+    sensex_current, sensex_change, sensex_pct = quote_from_history(histories.get("^BSESN")) or (66590, 234, 0.35)
+    banknifty_current, banknifty_change, banknifty_pct = quote_from_history(histories.get("^NSEBANK")) or (45235, -89, -0.20)
+    niftyit_quote = quote_from_history(histories.get("^CNXIT"))
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("NIFTY 50", f"{nifty_current:,.0f}", f"{nifty_change:+.0f} ({nifty_pct:+.2f}%)")
+    with col2:
+        st.metric("SENSEX", f"{sensex_current:,.0f}", f"{sensex_change:+.0f} ({sensex_pct:+.2f}%)")
+    with col3:
+        st.metric("BANK NIFTY", f"{banknifty_current:,.0f}", f"{banknifty_change:+.0f} ({banknifty_pct:+.2f}%)")
+    with col4:
+        if niftyit_quote:
+            niftyit_current, niftyit_change, niftyit_pct = niftyit_quote
+            st.metric("NIFTY IT", f"{niftyit_current:,.0f}", f"{niftyit_change:+.0f} ({niftyit_pct:+.2f}%)")
+        else:
+            st.metric("NIFTY IT", "29,876", "+157 (0.53%)")
+    # Only the indices shown here; universe failures are counted under the movers
+    index_errors = sorted(symbol for symbol in market_refresher.INDEX_SYMBOLS if symbol in fetch_errors)
+    if index_errors:
+        st.caption(f"Live data unavailable for: {', '.join(index_errors)}")
+    
+    title_col, range_col = st.columns([3, 2])
+    with range_col:
+        chart_range = st.radio("Range", list(RANGES), horizontal=True, label_visibility="collapsed", key="nifty_range")
+    with title_col:
+        st.markdown(f"#### 📈 NIFTY 50 Performance ({chart_range})")
+    
+    # Get real NIFTY historical data; figures are downsampled and cached
+    try:
+        with perf.span('render.nifty_chart'):
+            nifty_hist = range_history("^NSEI", chart_range, snapshot)
+            fig, points = price_chart("^NSEI", "NIFTY 50", chart_range, nifty_hist)
+        st.plotly_chart(fig, use_container_width=True)
+        if points < len(nifty_hist):
+            st.caption(f"Showing {points:,} of {len(nifty_hist):,} bars")
+    except LookupError as e:
+        st.error(f"Unable to load {chart_range} data: {str(e)}")
+    except Exception as e:
+        perf.record_error('render.nifty_chart', e)
+        st.error(f"Error loading chart data: {str(e)}")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        # Movers are ranked over the whole universe from the snapshot's
+        # aligned price matrix; values stay numeric until display
+        view_col, lookback_col = st.columns([3, 2])
+        with view_col:
+            view = st.radio("Movers", list(MOVER_VIEWS), horizontal=True, label_visibility="collapsed", key="movers_view")
+        with lookback_col:
+            lookback = st.selectbox("Lookback", list(LOOKBACKS), label_visibility="collapsed", key="movers_lookback")
+        heading, kind = MOVER_VIEWS[view]
+        st.markdown(f"#### {heading}")
         
-        st.markdown("#### 📈 NIFTY 50 Performance (6 Months)")
+        try:
+            closes = snapshot['closes'] if snapshot else pd.DataFrame()
+            with perf.span('render.movers'):
+                table = movers(closes, snapshot['volumes'], kind, lookback) if not closes.empty else None
+        except Exception as e:
+            perf.record_error('render.movers', e)
+            table = None
         
-        # Get real NIFTY historical data
+        if table is not None and not table.empty:
+            column_config = {label: st.column_config.NumberColumn(f"{label} %", format="%+.2f%%") for label in LOOKBACKS}
+            column_config['Price'] = st.column_config.NumberColumn(format="₹%.0f")
+            column_config['Volume x'] = st.column_config.NumberColumn(format="%.1fx")
+            st.dataframe(table, hide_index=True, column_config=column_config)
+            missing = len(fetch_errors) - len(index_errors)
+            st.caption(f"Ranked across {closes.shape[1]} stocks" + (f" ({missing} unavailable)" if missing else ""))
+        else:
+            # Fallback to static data
+            gainers = pd.DataFrame({
+                'Stock': ['RELIANCE', 'TCS', 'HDFC BANK'],
+                'Price': ['₹2,485', '₹3,654', '₹1,590'],
+                'Change (%)': ['+2.3%', '+1.8%', '+1.2%']
+            })
+            st.dataframe(gainers, hide_index=True)
+            st.caption("Sample data - Real-time data unavailable")
+    
+    with col2:
+        st.markdown("#### 📊 Market Sentiment")
         try:
-            nifty_hist = nifty.history(period="6mo")
-            if not nifty_hist.empty:
-                chart_data = pd.DataFrame({
-                    'Date': nifty_hist.index,
-                    'NIFTY 50': nifty_hist['Close']
+            # Sector returns and breadth are computed by the background
+            # refresher across the whole universe
+            if snapshot is None or snapshot['sectors'].empty or snapshot['breadth'] is None:
+                raise LookupError("Sector data unavailable")
+            sectors = snapshot['sectors']
+            breadth = snapshot['breadth']
+            
+            sectors = sectors.sort_values('Return %', ascending=False)
+            positive_sectors = sectors[sectors['Return %'] > 0]
+            negative_sectors = sectors[sectors['Return %'] < 0]
+            
+            sentiment_text = (f"**Breadth:** {breadth['advances']} advancing / "
+                              f"{breadth['declines']} declining\n\n")
+            sentiment_text += "**🟢 Positive Sectors:**\n"
+            for sector, row in positive_sectors.iterrows():
+                sentiment_text += f"- {sector} ({row['Return %']:+.1f}%, {row['Advances']:.0f}▲ {row['Declines']:.0f}▼)\n"
+            
+            sentiment_text += "\n**🔴 Negative Sectors:**\n"
+            for sector, row in negative_sectors.iterrows():
+                sentiment_text += f"- {sector} ({row['Return %']:+.1f}%, {row['Advances']:.0f}▲ {row['Declines']:.0f}▼)\n"
+            
+            st.markdown(sentiment_text)
+            with st.expander("Sector breadth"):
+                st.dataframe(sectors, column_config={
+                    'Return %': st.column_config.NumberColumn(format="%+.2f%%"),
+                    'A/D': st.column_config.NumberColumn(format="%.2f"),
+                    '% above 50DMA': st.column_config.NumberColumn(format="%.0f%%")
                 })
-                fig = px.line(chart_data, x='Date', y='NIFTY 50', title='NIFTY 50 - Real 6 Month Chart')
-                fig.update_traces(line_color='#667eea', line_width=2)
-                fig.update_layout(
-                    xaxis_title="Date",
-                    yaxis_title="Price",
-                    showlegend=False
-                )
-                st.plotly_chart(fig, use_container_width=True)
-            else:
-                st.error("Unable to load historical data")
+            
         except Exception as e:
-            st.error(f"Error loading chart data: {str(e)}")
+            # Missing data is expected before the first refresh; anything
+            # else is a bug worth counting
+            if not isinstance(e, LookupError):
+                perf.record_error('render.sentiment', e)
+            st.markdown("""
+            **🟢 Positive Sectors:**
+            - Banking (+1.2%)
+            - IT Services (+0.8%)
+            
+            **🔴 Negative Sectors:**
+            - Pharma (-0.5%)
+            - FMCG (-0.3%)
+            """)
+            st.caption("Sample data - Real-time sector data unavailable")
+
+@perf.timed('render.portfolio_planner')
+def render_portfolio_planner(client):
+    st.markdown("### 🎯 Portfolio Planner")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        age = st.slider("Age", 18, 65, key="age")
+        income = st.number_input("Monthly Income (₹)", 20000, 1000000, key="income")
+    with col2:
+        expenses = st.number_input("Monthly Expenses (₹)", 10000, 500000, key="expenses")
+        risk = st.selectbox("Risk Appetite", ["Conservative", "Moderate", "Aggressive"], key="risk")
+    
+    surplus = income - expenses
+    if surplus > 0:
+        st.success(f"💰 Investable Surplus: ₹{surplus:,}/month")
         
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("#### 🔥 Top Gainers")
-            try:
-                # Get real stock data for major Indian stocks
-                stocks = ['RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'INFY.NS', 'ICICIBANK.NS']
-                gainers_data = []
-                
-                for stock in stocks:
-                    try:
-                        ticker = yf.Ticker(stock)
-                        data = ticker.history(period="2d")
-                        if not data.empty and len(data) >= 2:
-                            current = data['Close'].iloc[-1]
-                            prev = data['Close'].iloc[-2]
-                            change_pct = ((current - prev) / prev) * 100
-                            gainers_data.append({
-                                'Stock': stock.replace('.NS', ''),
-                                'Price': f"₹{current:.0f}",
-                                'Change (%)': f"{change_pct:+.2f}%"
-                            })
-                    except:
-                        continue
-                
-                if gainers_data:
-                    # Sort by change percentage and take top 3
-                    gainers_data.sort(key=lambda x: float(x['Change (%)'].replace('%', '').replace('+', '')), reverse=True)
-                    gainers_df = pd.DataFrame(gainers_data[:3])
-                    st.dataframe(gainers_df, hide_index=True)
+        equity_pct = RISK_EQUITY_PCT[risk]
+        expected_return, volatility = portfolio_moments(allocation(risk))
+        with perf.span('render.projection'):
+            projection = wealth_projection(surplus, risk)
+        
+        st.markdown("#### 📈 Wealth Projection")
+        st.dataframe(pd.DataFrame({
+            'Years': HORIZONS,
+            'Invested': [f"₹{projection.loc[y, 'invested']:,.0f}" for y in HORIZONS],
+            'Pessimistic (P10)': [f"₹{projection.loc[y, 'p10']:,.0f}" for y in HORIZONS],
+            'Median': [f"₹{projection.loc[y, 'p50']:,.0f}" for y in HORIZONS],
+            'Optimistic (P90)': [f"₹{projection.loc[y, 'p90']:,.0f}" for y in HORIZONS]
+        }), hide_index=True)
+        with perf.span('render.projection_chart'):
+            fig = projection_chart(projection)
+        st.plotly_chart(fig, use_container_width=True)
+        st.caption(f"{equity_pct}% equity / {100-equity_pct}% debt · expected return {expected_return:.1%}, "
+                   f"volatility {volatility:.1%} · {N_PATHS:,} simulated paths")
+        
+        if st.button("🧠 Generate AI Strategy"):
+            with st.spinner("AI is creating your personalized strategy..."):
+                if client:
+                    prompt = strategy_prompt(age, income, expenses, risk)
+                    
+                    show_ai_response("**🎯 AI-Generated Portfolio Strategy**", prompt, client)
                 else:
-                    # Fallback to static data
-                    gainers = pd.DataFrame({
-                        'Stock': ['RELIANCE', 'TCS', 'HDFC BANK'],
-                        'Price': ['₹2,485', '₹3,654', '₹1,590'],
-                        'Change (%)': ['+2.3%', '+1.8%', '+1.2%']
-                    })
-                    st.dataframe(gainers, hide_index=True)
-                    st.caption("Sample data - Real-time data unavailable")
+                    equity_amount = int(surplus * equity_pct / 100)
+                    debt_amount = surplus - equity_amount
                     
-            except Exception as e:
-                # Fallback to static data
-                gainers = pd.DataFrame({
-                    'Stock': ['RELIANCE', 'TCS', 'HDFC BANK'],
-                    'Price': ['₹2,485', '₹3,654', '₹1,590'],
-                    'Change (%)': ['+2.3%', '+1.8%', '+1.2%']
-                })
-                st.dataframe(gainers, hide_index=True)
-                st.caption("Sample data - Real-time data unavailable")
-        
-        with col2:
-            st.markdown("#### 📊 Market Sentiment")
-            try:
-                # Calculate sector performance based on real data
-                sectors = {
-                    'Banking': banknifty_pct,
-                    'IT Services': niftyit_pct if 'niftyit_pct' in locals() else 0.8,
-                    'Pharma': -0.5,  # Would need additional API calls for these
-                    'FMCG': -0.3
-                }
-                
-                positive_sectors = [(k, v) for k, v in sectors.items() if v > 0]
-                negative_sectors = [(k, v) for k, v in sectors.items() if v < 0]
-                
-                sentiment_text = "**🟢 Positive Sectors:**\n"
-                for sector, pct in positive_sectors:
-                    sentiment_text += f"- {sector} ({pct:+.1f}%)\n"
-                
-                sentiment_text += "\n**🔴 Negative Sectors:**\n"
-                for sector, pct in negative_sectors:
-                    sentiment_text += f"- {sector} ({pct:+.1f}%)\n"
-                
-                st.markdown(sentiment_text)
-                
-            except:
-                st.markdown("""
-                **🟢 Positive Sectors:**
-                - Banking (+1.2%)
-                - IT Services (+0.8%)
-                
-                **🔴 Negative Sectors:**
-                - Pharma (-0.5%)
-                - FMCG (-0.3%)
-                """)
-                st.caption("Sample data - Real-time sector data unavailable")
+                    st.markdown(f"""
+                    ### 🎯 Recommended Portfolio
+                    
+                    **Monthly Investment:** ₹{surplus:,}
+                    - **Equity ({equity_pct}%):** ₹{equity_amount:,}
+                    - **Debt ({100-equity_pct}%):** ₹{debt_amount:,}
+                    
+                    **Expected Returns:** {expected_return:.1%} annually
+                    **10-Year Corpus (median):** ₹{projection.loc[10, 'p50']:,.0f}
+                    
+                    **Fund Recommendations:**
+                    - Large Cap: HDFC Top 100 Fund
+                    - Multi Cap: Parag Parikh Flexi Cap
+                    - ELSS: Axis Long Term Equity
+                    
+                    *Demo strategy - Configure API keys for personalized AI analysis*
+                    """)
+    else:
+        st.warning("⚠️ No investable surplus detected.")
     
-    with tab3:
-        st.markdown("### 🎯 Portfolio Planner")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            age = st.slider("Age", 18, 65, 30)
-            income = st.number_input("Monthly Income (₹)", 20000, 1000000, 75000)
-        with col2:
-            expenses = st.number_input("Monthly Expenses (₹)", 10000, 500000, 45000)
-            risk = st.selectbox("Risk Appetite", ["Conservative", "Moderate", "Aggressive"])
-        
-        surplus = income - expenses
-        if surplus > 0:
-            st.success(f"💰 Investable Surplus: ₹{surplus:,}/month")
-            
-            if st.button("🧠 Generate AI Strategy"):
-                with st.spinner("AI is creating your personalized strategy..."):
-                    if client:
-                        prompt = f"""Create a personalized investment strategy for:
-                        - Age: {age}
-                        - Monthly Income: ₹{income:,}
-                        - Monthly Expenses: ₹{expenses:,}
-                        - Surplus: ₹{surplus:,}
-                        - Risk Appetite: {risk}
-                        
-                        Provide:
-                        1) Asset allocation strategy
-                        2) Specific mutual fund recommendations
-                        3) Expected returns and time horizon
-                        4) Tax optimization
-                        5) 10-year wealth projection
-                        
-                        Consider Indian market context and regulations."""
-                        
-                        response = get_ai_response(prompt, client)
-                        st.markdown(f"**🎯 AI-Generated Portfolio Strategy**\n\n{response}")
-                    else:
-                        equity_pct = 40 if risk == "Conservative" else 60 if risk == "Moderate" else 80
-                        equity_amount = int(surplus * equity_pct / 100)
-                        debt_amount = surplus - equity_amount
-                        
-                        st.markdown(f"""
-                        ### 🎯 Recommended Portfolio
-                        
-                        **Monthly Investment:** ₹{surplus:,}
-                        - **Equity ({equity_pct}%):** ₹{equity_amount:,}
-                        - **Debt ({100-equity_pct}%):** ₹{debt_amount:,}
-                        
-                        **Expected Returns:** 12-14% annually
-                        **10-Year Corpus:** ₹{surplus * 12 * 10 * 2:,}
-                        
-                        **Fund Recommendations:**
-                        - Large Cap: HDFC Top 100 Fund
-                        - Multi Cap: Parag Parikh Flexi Cap
-                        - ELSS: Axis Long Term Equity
-                        
-                        *Demo strategy - Configure API keys for personalized AI analysis*
-                        """)
+    render_batch_strategies(client)
+
+# Many client profiles at once. Results are written under the upload's hash,
+# so generating the same file again resumes or reuses the earlier run.
+def render_batch_strategies(client):
+    with st.expander("📋 Batch strategies for many clients"):
+        st.caption("CSV with age, income, expenses and risk columns (client_id optional). "
+                   "Similar profiles share one AI request; projections are computed for every client.")
+        upload = st.file_uploader("Client profiles", type="csv", label_visibility="collapsed")
+        if upload is None or not st.button("🧠 Generate Batch Strategies"):
+            return
+        data = upload.getvalue()
+        os.makedirs(batch_strategies.OUTPUT_DIR, exist_ok=True)
+        output = os.path.join(batch_strategies.OUTPUT_DIR, f"{hashlib.sha256(data).hexdigest()[:16]}.jsonl")
+        bar = st.progress(0.0, text="Generating strategies...")
+        try:
+            summary = batch_strategies.generate(
+                io.BytesIO(data), output, client,
+                progress=lambda done, total: bar.progress(done / total if total else 1.0, text=f"{done}/{total} clients")
+            )
+        except batch_strategies.BatchInProgress:
+            bar.empty()
+            st.info("This file is already being generated in another session. Try again when it finishes.")
+            return
+        except ValueError as e:
+            st.error(f"Invalid profiles file: {str(e)}")
+            return
+        bar.empty()
+        message = (f"{summary['profiles']:,} clients · {summary['buckets']:,} AI requests · "
+                   f"{summary['skipped']:,} already done")
+        if summary['failed']:
+            st.warning(f"⚠️ {message} · {summary['failed']:,} failed - generate again to retry them")
         else:
-            st.warning("⚠️ No investable surplus detected.")
+            st.success(f"✅ {message}")
+        if client is None:
+            st.caption("Demo mode - projections only; configure API keys for AI strategies")
+        with open(output, "rb") as f:
+            st.download_button("Download results (JSONL)", f.read(), file_name=f"strategies-{upload.name}.jsonl")
+
+# Only the selected view runs on a rerun, so interacting with one view never
+# fetches or renders another (st.tabs executes every tab body)
+VIEWS = {
+    "🤖 AI Assistant": lambda client: render_ai_assistant(client),
+    "📊 Market Data": lambda client: render_market_data(),
+    "🎯 Portfolio Planner": lambda client: render_portfolio_planner(client)
+}
+# Streamlit drops the state of widgets that were not rendered in a run;
+# re-assigning it keeps inputs when switching between views. Defaults are set
+# here because a widget may not have both a default and a session state value.
+# Session state holds only these inputs: market data lives in the shared
+# snapshot and AI answers in the shared response cache.
+VIEW_STATE = {
+    "analyze_symbol": "HDFCBANK",
+    "advisor_query": None,
+    "nifty_range": "6M",
+    "movers_view": None,
+    "movers_lookback": None,
+    "age": 30,
+    "income": 75000,
+    "expenses": 45000,
+    "risk": None
+}
+
+def keep_view_state():
+    for key, default in VIEW_STATE.items():
+        if key in st.session_state:
+            st.session_state[key] = st.session_state[key]
+        elif default is not None:
+            st.session_state[key] = default
+
+def main():
+    st.markdown("""
+    <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+                padding: 2rem; border-radius: 10px; color: white; text-align: center; margin-bottom: 2rem;'>
+        <h1>🧠 AI Wealth Management</h1>
+        <p>Intelligent Investment Strategies for Indian Markets</p>
+        <p><strong>By Sandeep Yadav</strong> | Advanced AI-Powered Financial Planning</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    market_refresher.start()
+    perf.start_metrics_server()
+    
+    # Check API status
+    client = get_ai_client()
+    if client:
+        st.success("✅ AI System Active - Real-time Analysis Available")
+    else:
+        st.info("ℹ️ Demo Mode - Configure API keys for full functionality")
+    
+    keep_view_state()
+    view = st.radio("View", list(VIEWS), horizontal=True, label_visibility="collapsed", key="view")
+    VIEWS[view](client)
     
     st.markdown("---")
     st.markdown("""
@@ -467,6 +702,10 @@ def main():
         📧 <a href="mailto:contact@sandeepyadav.co.in" style="color: white;">contact@sandeepyadav.co.in</a>
     </div>
     """, unsafe_allow_html=True)
+    
+    if is_admin():
+        render_admin_panel()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with perf.span('render.total'):
+        main()
\ No newline at end of file
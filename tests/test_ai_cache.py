@@ -0,0 +1,18 @@
+import numpy as np
+
+from ai_cache import ResponseCache, make_key
+
+
+def test_market_inputs_are_rounded_whatever_their_numeric_type():
+    plain = make_key("model", "Analyze at 1591.2", {'price': 1591.2, 'market_cap': 10**12})
+    numpy = make_key("model", "Analyze at 1591.3", {'price': np.float32(1591.3), 'market_cap': np.int64(10**12)})
+    assert plain == numpy
+    assert plain != make_key("model", "Analyze at 1700", {'price': 1700.0, 'market_cap': 10**12})
+
+
+def test_peek_does_not_count(tmp_path):
+    cache = ResponseCache(str(tmp_path / "ai.sqlite3"), 10)
+    assert cache.get("k") is None and cache.peek("k") is None
+    cache.set("k", "answer")
+    assert cache.peek("k") == "answer" and cache.get("k") == "answer"
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,133 @@
+import time
+from contextlib import contextmanager
+
+import httpx
+import anthropic
+import pytest
+
+import ai_service
+from ai_service import CircuitBreaker, UpstreamUnavailable
+
+COOLDOWN = 0.05
+
+
+def server_error():
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    return anthropic.InternalServerError("overloaded", response=httpx.Response(529, request=request), body=None)
+
+
+class FakeMessages:
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def create(self, **kwargs):
+        if self.fail:
+            raise server_error()
+        return type("Message", (), {"content": [type("Block", (), {"text": "ok"})()]})()
+
+    @contextmanager
+    def stream(self, **kwargs):
+        if self.fail:
+            raise server_error()
+        yield type("Stream", (), {"text_stream": iter(["o", "k"])})()
+
+
+class FakeClient:
+    def __init__(self, fail=False):
+        self.messages = FakeMessages(fail)
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker(threshold=1, cooldown=COOLDOWN)
+    monkeypatch.setattr(ai_service, "breaker", breaker)
+    monkeypatch.setattr(ai_service, "MAX_RETRIES", 0)
+    return breaker
+
+
+def open_and_cool_down(breaker):
+    breaker.record_failure()
+    assert breaker.is_open and not breaker.allow()
+    time.sleep(COOLDOWN * 1.5)
+    assert not breaker.is_open
+
+
+def test_opens_after_threshold_and_rejects_during_cooldown():
+    breaker = CircuitBreaker(threshold=2, cooldown=COOLDOWN)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.is_open and breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open and not breaker.allow()
+
+
+def test_single_trial_after_cooldown():
+    breaker = CircuitBreaker(threshold=1, cooldown=COOLDOWN)
+    open_and_cool_down(breaker)
+    ticket = breaker.allow()
+    assert ticket
+    assert not breaker.allow()
+    breaker.release(ticket)
+    assert breaker.allow()
+
+
+def test_trial_success_closes_and_failure_reopens():
+    breaker = CircuitBreaker(threshold=3, cooldown=COOLDOWN)
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(COOLDOWN * 1.5)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open and not breaker.allow()
+
+    time.sleep(COOLDOWN * 1.5)
+    ticket = breaker.allow()
+    breaker.record_success()
+    breaker.release(ticket)
+    assert breaker.opened_at is None and breaker.failures == 0
+    assert breaker.allow() and breaker.allow()
+
+
+def test_release_of_a_normal_call_keeps_the_trial():
+    breaker = CircuitBreaker(threshold=1, cooldown=COOLDOWN)
+    normal = breaker.allow()
+    open_and_cool_down(breaker)
+    assert breaker.allow()
+    breaker.release(normal)
+    assert not breaker.allow()
+
+
+def test_closed_trial_stream_is_released(breaker):
+    open_and_cool_down(breaker)
+    stream = ai_service.stream_response(FakeClient(), "hi")
+    assert next(stream) == "o"
+    stream.close()  # what a Streamlit rerun does mid-stream
+    assert ai_service.create_response(FakeClient(), "hi") == "ok"
+    assert breaker.opened_at is None
+
+
+def test_queue_timeout_does_not_take_the_trial(breaker, monkeypatch):
+    open_and_cool_down(breaker)
+    monkeypatch.setattr(ai_service, "_slots", ai_service.threading.BoundedSemaphore(1))
+    monkeypatch.setattr(ai_service, "QUEUE_TIMEOUT", 0.01)
+    ai_service._slots.acquire()
+    with pytest.raises(UpstreamUnavailable):
+        ai_service.create_response(FakeClient(), "hi")
+    ai_service._slots.release()
+    assert ai_service.create_response(FakeClient(), "hi") == "ok"
+
+
+def test_failed_trial_reopens(breaker):
+    open_and_cool_down(breaker)
+    with pytest.raises(anthropic.InternalServerError):
+        ai_service.create_response(FakeClient(fail=True), "hi")
+    assert breaker.is_open
+    with pytest.raises(UpstreamUnavailable):
+        list(ai_service.stream_response(FakeClient(), "hi"))
+
+
+def test_long_retry_after_is_capped():
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    response = httpx.Response(429, request=request, headers={"retry-after": "120"})
+    exc = anthropic.RateLimitError("rate limited", response=response, body=None)
+    assert ai_service._backoff(0, exc) == ai_service.BACKOFF_MAX
@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import batch_strategies
+from portfolio_engine import strategy_prompt
+
+
+class DictCache:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.data[key] = value
+
+
+@pytest.fixture
+def prompts(monkeypatch):
+    prompts = []
+
+    def create_response(client, prompt):
+        prompts.append(prompt)
+        return f"strategy {len(prompts)}"
+
+    monkeypatch.setattr(batch_strategies, "create_response", create_response)
+    monkeypatch.setattr(batch_strategies, "response_cache", DictCache())
+    return prompts
+
+
+def profiles():
+    return pd.DataFrame({
+        'client_id': ['a', 'b', 'c'],
+        'age': [31, 33, 40],
+        'income': [46000, 47400, 30000],
+        'expenses': [44000, 47300, 40000],
+        'risk': ['Moderate', 'Moderate', 'Moderate'],
+    })
+
+
+def read(path):
+    return {row['client_id']: row for row in map(json.loads, path.read_text().splitlines())}
+
+
+def test_small_surplus_is_not_rounded_away():
+    buckets = batch_strategies.bucket_profiles(batch_strategies.load_profiles(profiles()))
+    surplus = buckets['income'] - buckets['expenses']
+    assert list(surplus) == [5000, 5000, 0]
+    assert buckets.loc[0, 'bucket'] == buckets.loc[1, 'bucket']
+
+
+def test_prompt_shows_the_rounded_surplus(tmp_path, prompts):
+    batch_strategies.generate(profiles(), str(tmp_path / "out.jsonl"), client=object())
+    assert prompts == [strategy_prompt(32, 45000, 40000, 'Moderate')]
+    assert "Surplus: ₹5,000" in prompts[0]
+
+
+def test_rows_without_strategy_are_redone_with_a_client(tmp_path, prompts):
+    output = tmp_path / "out.jsonl"
+    first = batch_strategies.generate(profiles(), str(output), client=None)
+    assert first['written'] == 3 and prompts == []
+    assert batch_strategies.completed_clients(str(output)) == {'a', 'b', 'c'}
+    assert batch_strategies.completed_clients(str(output), with_strategy=True) == {'c'}
+
+    second = batch_strategies.generate(profiles(), str(output), client=object())
+    assert second['skipped'] == 1 and second['buckets'] == 1 and second['written'] == 2
+    rows = output.read_text().splitlines()
+    assert len(rows) == 3
+    assert {cid: row['strategy'] for cid, row in read(output).items()} == {'a': "strategy 1", 'b': "strategy 1", 'c': None}
+
+    third = batch_strategies.generate(profiles(), str(output), client=object())
+    assert third['skipped'] == 3 and len(prompts) == 1
+
+
+def test_partial_line_is_dropped_and_regenerated(tmp_path, prompts):
+    output = tmp_path / "out.jsonl"
+    batch_strategies.generate(profiles(), str(output), client=object())
+    output.write_text("\n".join(output.read_text().splitlines()[:2]) + '\n{"client_id": "')
+    summary = batch_strategies.generate(profiles(), str(output), client=object())
+    assert summary['skipped'] == 2 and summary['written'] == 1
+    assert set(read(output)) == {'a', 'b', 'c'}
+
+
+def test_interrupt_from_progress_does_not_wait_for_queued_requests(tmp_path, monkeypatch):
+    started = []
+
+    def create_response(client, prompt):
+        started.append(prompt)
+        time.sleep(0.2)
+        return "strategy"
+
+    def progress(done, total):
+        if done:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(batch_strategies, "create_response", create_response)
+    monkeypatch.setattr(batch_strategies, "response_cache", DictCache())
+    many = pd.DataFrame({
+        'client_id': [str(i) for i in range(20)],
+        'age': [20 + 5 * i for i in range(20)],
+        'income': [100000] * 20,
+        'expenses': [50000] * 20,
+        'risk': ['Moderate'] * 20,
+    })
+    output = tmp_path / "out.jsonl"
+    began = time.monotonic()
+    with pytest.raises(KeyboardInterrupt):
+        batch_strategies.generate(many, str(output), client=object(), concurrency=2, progress=progress)
+    assert time.monotonic() - began < 1
+    time.sleep(0.3)
+    assert len(started) <= 4
+    assert len(batch_strategies.completed_clients(str(output))) == 1
+
+
+def test_empty_strategy_is_not_cached_or_written(tmp_path, monkeypatch):
+    answers = iter(["", "strategy"])
+    monkeypatch.setattr(batch_strategies, "create_response", lambda client, prompt: next(answers))
+    monkeypatch.setattr(batch_strategies, "response_cache", DictCache())
+    output = tmp_path / "out.jsonl"
+    first = batch_strategies.generate(profiles(), str(output), client=object())
+    assert first['failed'] == 2 and first['written'] == 1
+    assert batch_strategies.completed_clients(str(output), with_strategy=True) == {'c'}
+    second = batch_strategies.generate(profiles(), str(output), client=object())
+    assert second['written'] == 2
+    assert read(output)['a']['strategy'] == "strategy"
+
+
+def test_second_run_on_the_same_output_is_rejected(tmp_path, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def create_response(client, prompt):
+        started.set()
+        release.wait(2)
+        return "strategy"
+
+    monkeypatch.setattr(batch_strategies, "create_response", create_response)
+    monkeypatch.setattr(batch_strategies, "response_cache", DictCache())
+    output = str(tmp_path / "out.jsonl")
+    first = threading.Thread(target=batch_strategies.generate, args=(profiles(), output), kwargs={'client': object()})
+    first.start()
+    assert started.wait(2)
+    with pytest.raises(batch_strategies.BatchInProgress):
+        batch_strategies.generate(profiles(), output, client=object())
+    release.set()
+    first.join(2)
+    assert batch_strategies.generate(profiles(), output, client=object())['skipped'] == 3
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import charts
+from charts import downsample, lttb, price_chart
+from market_cache import TTLCache
+
+
+@pytest.mark.parametrize("n, threshold", [(10, 3), (100, 7), (1000, 500), (2500, 500), (501, 500), (5, 4)])
+def test_lttb_keeps_threshold_points_in_order(n, threshold):
+    rng = np.random.default_rng(n)
+    x = np.arange(n, dtype=float)
+    y = np.cumsum(rng.normal(size=n))
+    indices = lttb(x, y, threshold)
+    assert len(indices) == threshold
+    assert indices[0] == 0 and indices[-1] == n - 1
+    assert (np.diff(indices) > 0).all()
+
+
+@pytest.mark.parametrize("n, threshold", [(10, 10), (10, 20), (10, 2), (10, 0)])
+def test_lttb_passes_short_series_and_tiny_budgets_through(n, threshold):
+    x = np.arange(n, dtype=float)
+    assert list(lttb(x, x, threshold)) == list(range(n))
+
+
+def series(n):
+    index = pd.bdate_range("2015-01-01", periods=n, tz="Asia/Kolkata")
+    return pd.Series(np.linspace(100, 200, n), index=index)
+
+
+def test_downsample():
+    assert len(downsample(series(2000), budget=300)) == 300
+    short = series(100)
+    assert downsample(short, budget=300).equals(short)
+
+
+def test_price_chart_reuses_the_figure_until_the_data_changes(monkeypatch):
+    monkeypatch.setattr(charts, "_figures", TTLCache(60, 8, name='test'))
+    hist = series(800).to_frame('Close')
+    fig, points = price_chart("^NSEI", "NIFTY 50", '5Y', hist)
+    assert points == charts.POINT_BUDGET
+    assert price_chart("^NSEI", "NIFTY 50", '5Y', hist.copy())[0] is fig
+
+    updated = hist.copy()
+    updated.iloc[-1, 0] += 1
+    assert price_chart("^NSEI", "NIFTY 50", '5Y', updated)[0] is not fig
+    longer = series(801).to_frame('Close')
+    assert price_chart("^NSEI", "NIFTY 50", '5Y', longer)[0] is not fig
@@ -0,0 +1,48 @@
+import threading
+
+import pytest
+
+import fundamentals
+from market_cache import TTLCache
+
+
+@pytest.fixture
+def release():
+    return threading.Event()
+
+
+@pytest.fixture
+def lookups(monkeypatch, release):
+    # Symbols passed to the fake _load; "BAD" has no listing and symbols
+    # starting with "SLOW" block until `release` is set
+    lookups = []
+
+    def load(symbol):
+        lookups.append(symbol)
+        if symbol.startswith("SLOW"):
+            release.wait(5)
+        if symbol == "BAD":
+            raise LookupError(f"No listing found for {symbol}")
+        return {'company': symbol, 'market_cap': 1, 'pe_ratio': 1}
+
+    monkeypatch.setattr(fundamentals, "_load", load)
+    monkeypatch.setattr(fundamentals, "cache", TTLCache(60, 100, name='test'))
+    return lookups
+
+
+def test_not_found_is_cached(lookups):
+    for _ in range(2):
+        results, errors = fundamentals.fetch_fundamentals(["BAD", "TCS.NS"], timeout=2)
+        assert set(results) == {"TCS.NS"}
+        assert errors["BAD"]['kind'] == 'not_found'
+    assert sorted(lookups) == ["BAD", "TCS.NS"]
+
+
+def test_interactive_lookups_do_not_queue_behind_the_refresher(lookups, release):
+    slow = [f"SLOW{i}" for i in range(fundamentals.BACKGROUND_CONCURRENCY * 3)]
+    pending = fundamentals.submit_fundamentals(slow, timeout=5, background=True)
+    results, errors = fundamentals.fetch_fundamentals(["TCS.NS"], timeout=1)
+    assert set(results) == {"TCS.NS"} and not errors
+    assert not pending.done()
+    release.set()
+    assert len(pending.result()[0]) == len(slow)
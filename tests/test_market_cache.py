@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+import market_refresher
+import ohlcv_store
+from market_cache import compact_frame
+
+
+def bars(n=5):
+    index = pd.bdate_range("2024-01-01", periods=n, tz="Asia/Kolkata")
+    return pd.DataFrame({column: np.arange(n, dtype=np.float64) + 1 for column in ohlcv_store.COLUMNS + ['Dividends']},
+                        index=index)
+
+
+def test_compact_frame_is_float32_and_read_only():
+    compact = compact_frame(bars(), ohlcv_store.COLUMNS)
+    assert list(compact.columns) == ohlcv_store.COLUMNS
+    assert (compact.dtypes == np.float32).all()
+    assert not compact.to_numpy().flags.writeable
+
+
+def test_compact_frame_returns_compact_frames_as_is():
+    compact = compact_frame(bars(), ohlcv_store.COLUMNS)
+    assert compact_frame(compact) is compact
+    assert compact_frame(compact, ohlcv_store.COLUMNS) is compact
+
+
+def test_snapshot_shares_memory_with_the_cached_frames(monkeypatch):
+    monkeypatch.setattr(market_refresher, "_snapshot", None)
+    cached = compact_frame(bars(), ohlcv_store.COLUMNS)
+    market_refresher._publish({"^NSEI": cached}, {}, {}, {}, 0.0)
+    published = market_refresher.latest()['histories']["^NSEI"]
+    assert np.shares_memory(published.to_numpy(), cached.to_numpy())
@@ -0,0 +1,52 @@
+import pytest
+
+import ohlcv_store
+from benchmarks import fakes
+
+
+@pytest.fixture
+def requests(monkeypatch, tmp_path):
+    # Every history() call that reaches the fake Yahoo, as its keyword args
+    requests = []
+
+    class Ticker(fakes.FakeTicker):
+        def history(self, **kwargs):
+            requests.append(kwargs)
+            return super().history(**kwargs)
+
+    monkeypatch.setattr(ohlcv_store, "STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(ohlcv_store.yf, "Ticker", Ticker)
+    monkeypatch.setattr(fakes.yahoo, "failure_rate", 0.0)
+    return requests
+
+
+def test_second_call_fetches_only_the_tail(requests):
+    first = ohlcv_store.history("TCS.NS", "6mo")
+    second = ohlcv_store.history("TCS.NS", "6mo")
+    assert [r.get('period') for r in requests] == ["6mo", None]
+    assert requests[1]['start'] == first.index[-1].date()
+    assert second.equals(first)
+
+
+def test_longer_period_than_stored_downloads_in_full(requests):
+    ohlcv_store.history("TCS.NS", "6mo")
+    hist = ohlcv_store.history("TCS.NS", "5y")
+    assert [r.get('period') for r in requests] == ["6mo", "5y"]
+    assert len(hist) > 1000
+    ohlcv_store.history("TCS.NS", "1y")
+    assert requests[-1].get('period') is None
+
+
+def test_stored_history_needs_the_whole_period(requests):
+    ohlcv_store.history("TCS.NS", "6mo")
+    assert ohlcv_store.stored_history("TCS.NS", "10y") is None
+    assert len(ohlcv_store.stored_history("TCS.NS", "3mo")) > 0
+    assert len(requests) == 1
+
+
+def test_upstream_failure_serves_only_covering_bars(requests, monkeypatch):
+    stored = ohlcv_store.history("TCS.NS", "6mo")
+    monkeypatch.setattr(fakes.yahoo, "failure_rate", 1.0)
+    assert ohlcv_store.history("TCS.NS", "6mo").equals(stored)
+    with pytest.raises(ConnectionError):
+        ohlcv_store.history("TCS.NS", "5y")
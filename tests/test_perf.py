@@ -0,0 +1,30 @@
+import socket
+
+import perf
+from market_cache import TTLCache
+
+
+def test_metrics_server_on_a_taken_port_is_tried_once(monkeypatch, caplog):
+    monkeypatch.setattr(perf, "_server", None)
+    monkeypatch.setattr(perf, "_server_attempted", False)
+    with socket.socket() as taken:
+        taken.bind(("0.0.0.0", 0))
+        taken.listen()
+        port = taken.getsockname()[1]
+        perf.start_metrics_server(port)
+        perf.start_metrics_server(port)
+    assert perf._server is None
+    assert len([r for r in caplog.records if "Metrics server not started" in r.getMessage()]) == 1
+
+
+def test_cache_metrics_are_exported_under_their_label(monkeypatch):
+    monkeypatch.setattr(perf, "_collectors", [])
+    cache = TTLCache(60, 4, name='test')
+    cache.register_metrics('test')
+    cache.set('a', 1)
+    cache.get('a')
+    cache.get('b')
+    exported = perf.render_prometheus()
+    assert 'wealth_cache_hits_total{cache="test"} 1' in exported
+    assert 'wealth_cache_misses_total{cache="test"} 1' in exported
+    assert 'wealth_cache_size{cache="test"} 1' in exported
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio_engine import allocation, plan_table, simulate_sip
+
+PATHS = 2001
+
+
+def test_percentiles_are_ordered_and_invested_is_the_sum_of_contributions():
+    projection = simulate_sip(10000, allocation("Moderate"), years=10, n_paths=PATHS, seed=0)
+    assert list(projection.index) == list(range(1, 11))
+    bands = projection[['p10', 'p25', 'p50', 'p75', 'p90']].to_numpy()
+    assert (np.diff(bands, axis=1) >= 0).all()
+    assert list(projection['invested']) == [10000 * 12 * years for years in range(1, 11)]
+
+
+@pytest.mark.parametrize("n_paths", [1, 3, 1001])
+def test_odd_path_counts(n_paths):
+    projection = simulate_sip(1000, allocation("Aggressive"), years=2, n_paths=n_paths, seed=1)
+    assert np.isfinite(projection.to_numpy()).all()
+    assert (projection['p50'] > 0).all()
+
+
+def test_fixed_seed_is_reproducible():
+    first = simulate_sip(5000, allocation("Conservative"), years=5, n_paths=PATHS, seed=42)
+    second = simulate_sip(5000, allocation("Conservative"), years=5, n_paths=PATHS, seed=42)
+    pd.testing.assert_frame_equal(first, second)
+    other = simulate_sip(5000, allocation("Conservative"), years=5, n_paths=PATHS, seed=43)
+    assert not first.equals(other)
+
+
+def test_plan_table_matches_a_direct_simulation():
+    profiles = pd.DataFrame({'income': [90000, 40000], 'expenses': [50000, 45000], 'risk': ["Moderate"] * 2})
+    plans = plan_table(profiles, horizons=(5, 10), n_paths=PATHS, seed=0)
+    direct = simulate_sip(40000, allocation("Moderate"), years=10, n_paths=PATHS, percentiles=(10, 50, 90), seed=0)
+    for years in (5, 10):
+        assert plans.loc[0, f'invested_{years}y'] == 40000 * 12 * years
+        for p in (10, 50, 90):
+            assert plans.loc[0, f'corpus_{years}y_p{p}'] == pytest.approx(direct.loc[years, f'p{p}'], rel=1e-4)
+    # No surplus: nothing invested, nothing projected
+    assert plans.loc[1, 'invested_10y'] == 0 and plans.loc[1, 'corpus_10y_p50'] == 0
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sector_breadth import market_breadth, sector_breadth
+
+UNIVERSE = {
+    'HDFCBANK.NS': "Financial Services",
+    'BAJFINANCE.NS': "Financial Services",
+    'INFY.NS': "Information Technology",
+    'TCS.NS': "Information Technology",
+}
+
+
+def closes(rows):
+    # rows: {symbol: [close per session]}
+    frame = pd.DataFrame(rows, dtype=float)
+    frame.index = pd.bdate_range("2024-01-01", periods=len(frame))
+    return frame
+
+
+def prices(**overrides):
+    rows = {'HDFCBANK.NS': [100, 102], 'BAJFINANCE.NS': [100, 101], 'INFY.NS': [100, 110], 'TCS.NS': [100, 95]}
+    rows.update(overrides)
+    return closes(rows)
+
+
+def test_missing_market_cap_gets_the_median_weight():
+    caps = {'HDFCBANK.NS': 200, 'BAJFINANCE.NS': 400, 'INFY.NS': 100}
+    sectors = sector_breadth(prices(), UNIVERSE, caps)
+    # TCS weighs the median cap (200) against INFY's 100: (100 * 10 + 200 * -5) / 300
+    assert sectors.loc["IT", 'Return %'] == pytest.approx(0.0)
+    assert sectors.loc["IT", 'Stocks'] == 2
+
+
+def test_banks_count_in_banking_and_financial_services():
+    sectors = sector_breadth(prices(), UNIVERSE)
+    assert sectors.loc["Banking", 'Stocks'] == 1
+    assert sectors.loc["Banking", 'Return %'] == pytest.approx(2.0)
+    assert sectors.loc["Financial Services", 'Stocks'] == 2
+    assert sectors.loc["Financial Services", 'Advances'] == 2
+
+
+def test_symbols_without_a_latest_change_are_left_out():
+    universe = dict(UNIVERSE, **{'ITC.NS': "Fast Moving Consumer Goods"})
+    sectors = sector_breadth(prices(**{'TCS.NS': [np.nan, 95], 'ITC.NS': [np.nan, np.nan]}), universe)
+    assert sectors.loc["IT", 'Return %'] == pytest.approx(10.0)
+    assert (sectors.loc["IT", 'Advances'], sectors.loc["IT", 'Declines']) == (1, 0)
+    assert np.isinf(sectors.loc["IT", 'A/D'])
+    # A sector with no valid member has no return and is dropped
+    assert "FMCG" not in sectors.index
+
+
+def test_stale_latest_session_counts_as_unchanged():
+    sectors = sector_breadth(prices(**{'TCS.NS': [100, np.nan]}), UNIVERSE)
+    assert sectors.loc["IT", 'Return %'] == pytest.approx(5.0)
+    assert (sectors.loc["IT", 'Advances'], sectors.loc["IT", 'Declines']) == (1, 0)
+
+
+def test_market_breadth():
+    assert market_breadth(prices()) == {'advances': 3, 'declines': 1, 'unchanged': 0}
+
+
+def test_fewer_than_two_sessions():
+    one = prices().iloc[-1:]
+    assert market_breadth(one) is None
+    assert market_breadth(one.iloc[:0]) is None
+    assert sector_breadth(one, UNIVERSE).empty
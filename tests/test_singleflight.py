@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pytest
+
+import singleflight
+from singleflight import SingleFlight
+
+WAITERS = 4
+
+
+@pytest.fixture
+def shared(monkeypatch):
+    # Followers call perf.count once when they start waiting on a leader
+    followers = []
+    monkeypatch.setattr(singleflight.perf, "count", lambda name, amount=1, **labels: followers.append(name))
+    return followers
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def run(flight, fn, threads):
+    # Starts threads + 1 identical calls; outcomes gets each one's result or
+    # exception once the threads are joined
+    outcomes = [None] * (threads + 1)
+
+    def call(i):
+        try:
+            outcomes[i] = flight.do("key", fn)
+        except BaseException as e:
+            outcomes[i] = e
+
+    workers = [threading.Thread(target=call, args=(i,)) for i in range(threads + 1)]
+    for worker in workers:
+        worker.start()
+    return workers, outcomes
+
+
+def test_concurrent_identical_calls_share_one_call(shared):
+    flight = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(2)
+        return "value"
+
+    workers, outcomes = run(flight, fn, WAITERS)
+    wait_for(lambda: len(shared) == WAITERS)
+    release.set()
+    for worker in workers:
+        worker.join(2)
+    assert len(calls) == 1
+    assert outcomes == ["value"] * (WAITERS + 1)
+    assert flight._calls == {}
+
+
+def test_exception_reaches_every_waiter(shared):
+    flight = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(2)
+        raise ValueError("upstream down")
+
+    workers, outcomes = run(flight, fn, WAITERS)
+    wait_for(lambda: len(shared) == WAITERS)
+    release.set()
+    for worker in workers:
+        worker.join(2)
+    assert len(calls) == 1
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    assert flight._calls == {}
+
+
+def test_interrupted_leader_hands_the_call_to_a_waiter(shared):
+    flight = SingleFlight("test")
+    release, retried = threading.Event(), threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(2)
+            raise KeyboardInterrupt
+        retried.wait(2)
+        return "value"
+
+    workers, outcomes = run(flight, fn, WAITERS)
+    wait_for(lambda: len(shared) == WAITERS)
+    release.set()
+    # The other waiters rejoin the new leader right away
+    wait_for(lambda: len(calls) == 2)
+    time.sleep(0.1)
+    retried.set()
+    for worker in workers:
+        worker.join(2)
+    assert len(calls) == 2
+    assert sum(isinstance(outcome, KeyboardInterrupt) for outcome in outcomes) == 1
+    assert outcomes.count("value") == WAITERS
+    assert flight._calls == {}
+
+
+def test_key_is_removed_so_later_calls_run_again():
+    flight = SingleFlight("test")
+    assert flight.do("key", lambda: 1) == 1
+    with pytest.raises(ValueError):
+        flight.do("key", lambda: int("x"))
+    assert flight.do("key", lambda: 2) == 2
+    assert flight._calls == {}